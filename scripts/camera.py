@@ -1,4 +1,25 @@
 import pygame
+import bisect
+import numpy
+from collections import OrderedDict
+
+import scripts.util.profiler as profiler
+
+# max amount of scaled tiles kept in memory
+TILE_CACHE_SIZE = 512
+
+# level chunks, in pixels per side
+CHUNK_PIXELS = 512
+# max bytes of pre-rendered chunks kept in memory
+CHUNK_BUDGET = 64 * 1024 * 1024
+
+def chunk_tiles(tilesize) -> int:
+    """
+        Tiles per chunk side at ``tilesize``, so chunks stay about
+        ``CHUNK_PIXELS`` wide at any zoom.
+    """
+
+    return max(1, int(CHUNK_PIXELS // max(tilesize[0], tilesize[1])))
 
 
 class Camera:
@@ -19,23 +40,111 @@ class Camera:
         self.tilesheet = tilesheet
 
         self.editor = editor
+
+        # scaled tiles, (tile_id, tilesize) -> pygame.Surface
+        self.tile_cache = OrderedDict()
+        self.tile_cache_size = TILE_CACHE_SIZE
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # pre-rendered level chunks, (cx, cy) -> pygame.Surface | None
+        self.chunked = True
+        self.chunks = OrderedDict()
+        self.chunk_map = None
+        self.chunk_size = chunk_tiles(self.tilesize)
+        # chunks re-rendered after an edit, not worth run-length encoding
+        self.edited_chunks = set()
+        self.chunk_bytes = 0
+        self.chunk_budget = CHUNK_BUDGET
+
+        # skip re-rendering when nothing changed
+        self.render_key = None
+        self.redraw = True
+        self.changed = True
+
+        # debug tiles bucketed by row
+        self.debug_source = (None, None)
+        self.debug_rows = {}
         
         self.calculate_tilesize()
 
 
     def calculate_tilesize(self):
         width, height = self.size
+        old_size = tuple(self.tilesize)
 
         self.tilesize.x = width / (self.ratio[0] * 10 / self.zoom)
         self.tilesize.y = height / (self.ratio[1] * 10 / self.zoom)
 
+        if tuple(self.tilesize) != old_size:
+            self.chunk_size = chunk_tiles(self.tilesize)
+
+            self.clear_tile_cache()
+            self.invalidate_chunks()
+
     def set_tilesheet(self, tilesheet: list):
+        if tilesheet is self.tilesheet: return
+
         self.tilesheet = tilesheet
 
+        self.clear_tile_cache()
+        self.invalidate_chunks()
 
-    def draw_map(self, map: list):
-        for y, vy in enumerate(map):
-            for x, vx in enumerate(vy):
+    def clear_tile_cache(self):
+        self.tile_cache.clear()
+
+    def get_tile(self, id: int) -> pygame.Surface:
+        key = (id, (self.tilesize.x, self.tilesize.y))
+        img = self.tile_cache.get(key)
+
+        if img is not None:
+            self.cache_hits += 1
+            self.tile_cache.move_to_end(key)
+            return img
+
+        self.cache_misses += 1
+
+        img = pygame.transform.scale(self.tilesheet[id - 1], self.tilesize)
+        self.tile_cache[key] = img
+
+        # evict least recently used
+        if len(self.tile_cache) > self.tile_cache_size:
+            self.tile_cache.popitem(last = False)
+
+        return img
+
+    def preload_tiles(self, ids):
+        """
+            Decodes and scales the given tile ids ahead of drawing.
+        """
+
+        for tile_id in ids:
+            if 0 < tile_id <= len(self.tilesheet):
+                self.get_tile(tile_id)
+
+
+    def visible_range(self) -> tuple[int, int, int, int]:
+        """
+            Returns the tile range covered by the camera as\n
+            ``(x_start, x_end, y_start, y_end)``, end exclusive.
+        """
+
+        x_start = int((self.position.x - 5) // self.tilesize.x)
+        x_end = int((self.position.x + self.size[0] + 5) // self.tilesize.x) + 1
+
+        # tiles one row above are kept, same as the old culling
+        y_start = int((self.position.y - self.tilesize.y - 5) // self.tilesize.y)
+        y_end = int((self.position.y + self.size[1] + 5) // self.tilesize.y) + 1
+
+        return (max(x_start, 0), max(x_end, 0), max(y_start, 0), max(y_end, 0))
+
+    def draw_tiles(self, map: list):
+        x_start, x_end, y_start, y_end = self.visible_range()
+
+        for y in range(y_start, min(y_end, len(map))):
+            vy = map[y]
+
+            for x, vx in enumerate(vy[x_start:x_end], x_start):
                 if (vx == 0): continue
 
                 pos = (
@@ -43,63 +152,206 @@ class Camera:
                     y * self.tilesize.y - self.position.y
                 )
 
-                # dont draw if not visible
-                if (
-                    pos[0] + self.tilesize.x + 5 < 0 or
-                    pos[0] - 5 > self.size[0] 
-                    or
-                    pos[1] + self.tilesize.y * 2 + 5 < 0 or
-                    pos[1] - 5 > self.size[1]
-                ): continue
+                self.surface.blit(self.get_tile(vx), pos)
+
+    def draw_map(self, map: list):
+        with profiler.scope("camera.draw_map"):
+            if self.chunked:
+                self.draw_chunks(map)
+            else:
+                self.draw_tiles(map)
+
+    # CHUNKS #
+    def invalidate_chunks(self):
+        self.chunks.clear()
+        self.chunk_bytes = 0
+        self.edited_chunks.clear()
 
-                img = pygame.transform.scale(self.tilesheet[vx-1], self.tilesize)
+        self.redraw = True
 
-                self.surface.blit(img, pos)
+    def prime_chunks(self, map: list, occupied, size: int):
+        """
+            Switches to ``map`` and records its empty chunks up front,
+            ``occupied[cy][cx]`` is ``False`` for ``size`` tile chunks without
+            tiles. Ignored if ``size`` is not the current chunk size.
+        """
+
+        self.invalidate_chunks()
+        self.chunk_map = map
+
+        if size != self.chunk_size: return
+
+        for cy, row in enumerate(occupied):
+            for cx, value in enumerate(row):
+                if not value:
+                    self.chunks[(cx, cy)] = None
+
+    def mark_cells(self, xs, ys):
+        """
+            Drops every chunk containing one of the tiles.
+        """
+
+        keys = numpy.unique(numpy.stack((xs // self.chunk_size, ys // self.chunk_size), axis=1), axis=0)
+
+        for key in map(tuple, keys.tolist()):
+            chunk = self.chunks.pop(key, None)
+            self.edited_chunks.add(key)
+
+            if chunk is not None:
+                self.chunk_bytes -= chunk.get_width() * chunk.get_height() * 4
+
+        self.redraw = True
+
+    def render_chunk(self, map: list, cx: int, cy: int):
+        size = self.chunk_size
+        x_start, y_start = cx * size, cy * size
+        chunk = None
+
+        for y in range(y_start, min(y_start + size, len(map))):
+            for x, vx in enumerate(map[y][x_start:x_start + size], x_start):
+                if (vx == 0): continue
+
+                if chunk is None:
+                    chunk = pygame.Surface(
+                        (int(size * self.tilesize.x) + 1, int(size * self.tilesize.y) + 1),
+                        pygame.SRCALPHA
+                    )
+
+                pos = (
+                    (x - x_start) * self.tilesize.x,
+                    (y - y_start) * self.tilesize.y
+                )
+
+                chunk.blit(self.get_tile(vx), pos)
+
+        # run-length encode so the transparent parts of a chunk blit for free,
+        # chunks being painted would be encoded again every frame
+        if chunk is not None and (cx, cy) not in self.edited_chunks:
+            chunk.set_alpha(255, pygame.RLEACCEL)
+
+        # empty chunks are stored as None
+        self.chunks[(cx, cy)] = chunk
+
+        if chunk is not None:
+            self.chunk_bytes += chunk.get_width() * chunk.get_height() * 4
+
+        return chunk
+
+    def evict_chunks(self, visible: set):
+        for key in list(self.chunks):
+            if self.chunk_bytes <= self.chunk_budget: break
+            if key in visible: continue
+
+            chunk = self.chunks.pop(key)
+
+            if chunk is not None:
+                self.chunk_bytes -= chunk.get_width() * chunk.get_height() * 4
+
+    def draw_chunks(self, map: list):
+        if map is not self.chunk_map:
+            self.invalidate_chunks()
+            self.chunk_map = map
+
+        x_start, x_end, y_start, y_end = self.visible_range()
+        visible = set()
+
+        size = self.chunk_size
+
+        for cy in range(y_start // size, (y_end - 1) // size + 1):
+            if cy * size >= len(map): break
+
+            for cx in range(x_start // size, (x_end - 1) // size + 1):
+                key = (cx, cy)
+                visible.add(key)
+
+                if key in self.chunks:
+                    chunk = self.chunks[key]
+                    self.chunks.move_to_end(key)
+                else:
+                    chunk = self.render_chunk(map, cx, cy)
+
+                if chunk is None: continue
+
+                pos = (
+                    cx * size * self.tilesize.x - self.position.x,
+                    cy * size * self.tilesize.y - self.position.y
+                )
+
+                self.surface.blit(chunk, pos)
+
+        if self.chunk_bytes > self.chunk_budget:
+            self.evict_chunks(visible)
+
+    def index_debug_tiles(self, nocollide, collide):
+        # row -> sorted [(x, color)], rebuilt only when the lists change
+        rows = {}
+
+        for tiles, color in ((nocollide, (255, 0, 0)), (collide, (0, 255, 0))):
+            for tile in tiles:
+                x, y = tile[1:]
+                rows.setdefault(int(y), []).append((int(x), color))
+
+        for row in rows.values():
+            row.sort()
+
+        self.debug_source = (nocollide, collide)
+        self.debug_rows = {y: ([x for x, _ in row], [c for _, c in row]) for y, row in rows.items()}
 
     def debug_draw(self, nocollide, collide):
-        for tile in nocollide:
-            x, y = tile[1:]
+        if self.debug_source[0] is not nocollide or self.debug_source[1] is not collide:
+            self.index_debug_tiles(nocollide, collide)
 
-            pos = (
-                    x * self.tilesize.x - self.position.x,
-                    y * self.tilesize.y - self.position.y
-            )
+        x_start, x_end, y_start, y_end = self.visible_range()
 
-                # dont draw if not visible
-            if (
-                pos[0] + self.tilesize.x + 5 < 0 or
-                pos[0] - 5 > self.size[0] 
-                or
-                pos[1] + self.tilesize.y * 2 + 5 < 0 or
-                pos[1] - 5 > self.size[1]
-            ): continue
+        for y in range(y_start, y_end):
+            row = self.debug_rows.get(y)
+            if row is None: continue
 
+            xs, colors = row
 
-            pygame.draw.rect(self.surface, (255, 0, 0), 
-                             pygame.Rect(pos, self.tilesize))
+            for i in range(bisect.bisect_left(xs, x_start), bisect.bisect_left(xs, x_end)):
+                pos = (
+                        xs[i] * self.tilesize.x - self.position.x,
+                        y * self.tilesize.y - self.position.y
+                )
 
-        for tile in collide:
-            x, y = tile[1:]
+                pygame.draw.rect(self.surface, colors[i], 
+                                 pygame.Rect(pos, self.tilesize))
 
-            pos = (
-                    x * self.tilesize.x - self.position.x,
-                    y * self.tilesize.y - self.position.y
-            )
+    def debug_draw_partition(self, state):
+        """
+            Same overlay as ``debug_draw`` from a ``LevelPartition.state`` array.
+        """
+
+        x_start, x_end, y_start, y_end = self.visible_range()
 
-                # dont draw if not visible
-            if (
-                pos[0] + self.tilesize.x + 5 < 0 or
-                pos[0] - 5 > self.size[0] 
-                or
-                pos[1] + self.tilesize.y * 2 + 5 < 0 or
-                pos[1] - 5 > self.size[1]
-            ): continue
+        for y, row in enumerate(state[y_start:y_end, x_start:x_end].tolist(), y_start):
+            for x, value in enumerate(row, x_start):
+                if value == 0: continue
 
+                pos = (
+                        x * self.tilesize.x - self.position.x,
+                        y * self.tilesize.y - self.position.y
+                )
 
-            pygame.draw.rect(self.surface, (0, 255, 0), 
-                             pygame.Rect(pos, self.tilesize))
+                # 1 = collidable, 2 = enclosed
+                pygame.draw.rect(self.surface, (0, 255, 0) if value == 1 else (255, 0, 0), 
+                                 pygame.Rect(pos, self.tilesize))
 
     def render(self, map: list, bg: tuple[int, int, int]):
-        self.surface.fill(bg)
+        key = (
+            tuple(self.position), tuple(self.tilesize), tuple(bg),
+            id(map), getattr(map, "version", None), id(self.tilesheet)
+        )
+
+        # surface still shows this frame
+        self.changed = self.redraw or key != self.render_key
+        if not self.changed: return
+
+        self.render_key = key
+        self.redraw = False
+
+        with profiler.scope("camera.render"):
+            self.surface.fill(bg)
 
-        self.draw_map(map)
\ No newline at end of file
+            self.draw_map(map)
\ No newline at end of file
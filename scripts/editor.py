@@ -3,10 +3,21 @@ import tkinter as tk
 from tkinter import filedialog
 import json
 import os
+import struct
+import zlib
+import math
+import numpy
 
 import scripts.misc.world as world
+import scripts.misc.grid as grid
+import scripts.misc.worldfile as worldfile
+import scripts.misc.partition as partition
+import scripts.misc.stroke as stroke
+import scripts.misc.history as history
+import scripts.misc.autosave as autosave
 import scripts.camera as camera
 import scripts.util.time as time
+import scripts.util.dirty as dirty
 import scripts.misc.ui as ui
 
 # constants
@@ -19,6 +30,18 @@ ICON_PATH = "assets/resource/icon_editor.png"
 ICON = pygame.image.load(ICON_PATH)
 
 DEFAULT_BG_COLOR = (0, 80, 100)
+WINDOW_BG_COLOR = (130, 130, 130)
+
+# tiles per tileset palette row, with half a tile of margin on both sides
+PALETTE_COLUMNS = 19
+
+# frame cap while nothing changes on screen
+IDLE_FPS = 30
+
+# how far a bucket fill may spread from the click, in tiles
+FILL_RANGE = (256, 64)
+
+FILETYPES = [("JSON file", "*.json"), ("SMM world", f"*{worldfile.EXTENSION}")]
 
 # enum
 STATE_EDITOR = 0
@@ -49,7 +72,7 @@ class Editor:
         self.level_bg_color = [DEFAULT_BG_COLOR]
 
         self.world = []
-        self.levelmap = []
+        self.levelmap = grid.LevelGrid()
         self.world_name = ""
 
         self.state = STATE_EDITOR
@@ -62,6 +85,13 @@ class Editor:
         self.camera = camera.Camera(self.window, (800, 600), self.tilesheet, True)
 
         self.tool = "brush"
+        self.stroke = stroke.Stroke()
+        self.journal = history.EditJournal()
+        self.autosave = autosave.Autosave()
+
+        # collision overlay, kept up to date while painting
+        self.debug = False
+        self.partition = None
 
         #   UI   #
         self.img_tools = {
@@ -106,6 +136,10 @@ class Editor:
         self.tileset_txt = 0
         self.tileset_scroll = 0.0 # 1.0 - 0.0
 
+        # tileset drawn once, scrolling windows into it
+        self.palette = None
+        self.palette_key = None
+
         self.file_button = ui.UIButtonList(
             pygame.Vector2(800, 0),
             (96, 32),
@@ -130,6 +164,13 @@ class Editor:
         )
         self.file_button.toggle = True
 
+        # only changed regions are presented
+        self.dirty = dirty.DirtyRects((WIDTH, HEIGHT))
+        self.ui_state = None
+        self.overlay_state = None
+        self.file_area = self.file_button.area()
+        self.idle = False
+
     def start(self):
         # initialize
         self.create_tilemap()
@@ -138,12 +179,16 @@ class Editor:
         # start loop
         self.gameloop()
 
+        # last autosave if anything was edited, waits for the file
+        self.save_level()
+        self.autosave.shutdown(self.world_data(self.world_name))
+
         # quit pygame & tkinter
         pygame.quit()
         self.tk.destroy()
 
     def create_tilemap(self):
-        self.levelmap = []
+        self.levelmap = grid.LevelGrid()
 
     def gameloop(self):
         while self.run:
@@ -157,6 +202,26 @@ class Editor:
                     self.select_tileset()
                     self.file_button.update()
 
+                # every sample of a stroke, not just one per frame
+                if event.type == pygame.MOUSEMOTION and event.buttons[0]:
+                    self.stroke_sample(event.pos)
+
+                # one fill per click, not one per frame the button is held
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    self.stroke_sample(event.pos)
+                    self.bucket_tool(event.pos)
+
+                # a release closes the stroke here, a press in the same frame
+                # starts a new one instead of being joined to it
+                if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                    self.stroke.end()
+                    self.apply_stroke()
+                    self.journal.commit()
+
+                # the window was uncovered, e.g. by a file dialog
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.dirty.invalidate()
+
                 if event.type == pygame.MOUSEWHEEL:
                     self.zoom_camera(event.y)
                     self.scroll_tileset(event.y)
@@ -171,6 +236,18 @@ class Editor:
                     if event.key == pygame.K_b:
                         self.tool = "brush"
 
+                    if event.key == pygame.K_f:
+                        self.tool = "bucket"
+
+                    if event.key == pygame.K_F1:
+                        self.debug = not self.debug
+
+                    if event.mod & pygame.KMOD_CTRL:
+                        if event.key == pygame.K_y or (event.key == pygame.K_z and event.mod & pygame.KMOD_SHIFT):
+                            self.redo()
+                        elif event.key == pygame.K_z:
+                            self.undo()
+
                     if event.key == pygame.K_RIGHT:
                         self.set_level(self.levelid + 1)
                         
@@ -179,26 +256,62 @@ class Editor:
 
 
             # update
-            time.update_dt(self.clock)
+            time.update_dt(self.clock, IDLE_FPS if self.idle else 0)
 
             # handle logic
             self.move_camera()
             self.handle_tools()
             self.handle_buttons()
 
+            if self.autosave.due():
+                self.save_level()
+                self.autosave.save(self.world_data(self.world_name))
+
             # draw screen
-            self.render()
+            self.idle = not self.render()
+
+    def render(self) -> bool:
+        """
+            Draws and presents the regions that changed since the last frame.\n
+            ``-> False`` if nothing changed and the frame was skipped
+        """
 
-    def render(self):
-        self.window.fill((130, 130, 130))
+        # cursor and debug overlay are drawn on the camera surface
+        mouse = pygame.mouse.get_pos() if self.state == STATE_EDITOR else None
+        overlay_state = (mouse, self.tool, self.selected_tile, self.state, self.debug)
+
+        if overlay_state != self.overlay_state:
+            self.overlay_state = overlay_state
+            self.camera.redraw = True
 
         self.camera.render(self.levelmap, self.level_bg_color[self.levelid - 1])
-        self.show_cursor()
+
+        if self.camera.changed:
+            self.debug_overlay()
+            self.show_cursor()
+            self.dirty.add(self.camera.rect)
+
+        ui_state = (self.state, self.selected_tile, self.tileset_scroll, self.file_button.click)
+
+        if ui_state != self.ui_state:
+            self.ui_state = ui_state
+
+            # old and new file menu, the tileset panel
+            file_area = self.file_button.area()
+            self.dirty.add(self.file_area.union(file_area))
+            self.dirty.add(self.ui_tileset.border)
+            self.file_area = file_area
+
+        if not self.dirty: return False
+
+        self.window.fill(WINDOW_BG_COLOR)
         self.window.blit(self.camera.surface, self.camera.rect)
 
         self.draw_ui()
 
-        pygame.display.update()
+        self.dirty.present()
+
+        return True
 
     
     def move_camera(self):
@@ -229,7 +342,7 @@ class Editor:
     def b_export(self):
         print("Exporting...")
 
-        filedata = filedialog.asksaveasfile(filetypes=[("JSON file", "*.json")], defaultextension="*.*")
+        filedata = filedialog.asksaveasfile(filetypes=FILETYPES, defaultextension="*.*")
 
         if filedata is None:
             print(f"Operation 'export' canceled.")
@@ -239,8 +352,30 @@ class Editor:
 
         path = filedata.name
 
+        data = self.world_data(os.path.splitext(os.path.basename(path))[0])
+
+        if os.path.splitext(path)[1] == worldfile.EXTENSION:
+            filedata.close()
+
+            worldfile.write_world(path, data["name"], data["tileset"], data["objset"], data["levels"])
+        else:
+            for lvldata in data["levels"].values():
+                lvldata["layout"] = lvldata["layout"].to_layout()
+
+            converted_json = json.dumps(data)
+
+            filedata.write(converted_json)
+            filedata.close()
+
+        print(f"Successfully exported to '{path}'!")
+
+    def world_data(self, name: str) -> dict:
+        """
+            The world in export shape, layouts are the live ``LevelGrid``s.
+        """
+
         data = {
-            "name": os.path.splitext(os.path.basename(path))[0],
+            "name": name,
             "tileset": self.tileset,
             "objset": self.objset,
 
@@ -262,17 +397,12 @@ class Editor:
 
             data["levels"][str(i + 1)] = lvldata
 
-        converted_json = json.dumps(data)
-
-        filedata.write(converted_json)
-        filedata.close()
-
-        print(f"Successfully exported to '{path}'!")
+        return data
 
     def b_import(self):
         print("Importing...")
 
-        filedata = filedialog.askopenfile(filetypes=[("JSON file", "*.json")], defaultextension="*.*")
+        filedata = filedialog.askopenfile(filetypes=FILETYPES, defaultextension="*.*")
 
         if filedata is None:
             print(f"Operation 'import' canceled.")
@@ -280,16 +410,29 @@ class Editor:
         
         path = filedata.name
 
-        try:
-            world_data = json.loads(filedata.read())
-        except json.decoder.JSONDecodeError:
-            print(f"Operation 'import' canceled: JSON file is empty.")
-            return
+        if os.path.splitext(path)[1] == worldfile.EXTENSION:
+            filedata.close()
+
+            try:
+                world_data = worldfile.read_world(path)
+            except ValueError:
+                print(f"Operation 'import' canceled: not a world file.")
+                return
+            except (struct.error, zlib.error, OSError) as error:
+                print(f"Operation 'import' canceled: world file is damaged ({error}).")
+                return
+        else:
+            try:
+                world_data = json.loads(filedata.read())
+            except json.decoder.JSONDecodeError:
+                print(f"Operation 'import' canceled: JSON file is empty.")
+                return
         
         
         self.world = []
         self.level_bg_color = []
-        self.levelmap = []
+        self.levelmap = grid.LevelGrid()
+        self.journal.clear()
 
         self.tileset = f'{world_data["tileset"]}'
         self.objset = f'{world_data["objset"]}'
@@ -297,9 +440,10 @@ class Editor:
 
         for v in world_data["levels"]:
             self.level_bg_color.append(world_data["levels"][v]["background-color"])
-            self.world.append(world_data["levels"][v]["layout"])
+            self.world.append(grid.LevelGrid.from_layout(world_data["levels"][v]["layout"]))
 
         self.update_spritesheets()
+        self.camera.preload_tiles(set().union(*(level.ids() for level in self.world)))
         
         self.levelmap = self.world[0]
         self.levelid = 1
@@ -313,8 +457,9 @@ class Editor:
 
         self.world = []
         self.level_bg_color = [DEFAULT_BG_COLOR]
-        self.levelmap = []
+        self.levelmap = grid.LevelGrid()
         self.levelid = 1
+        self.journal.clear()
 
         self.tileset = "smb_map"
         self.objset = "smp_obj"
@@ -324,7 +469,7 @@ class Editor:
         self.update_spritesheets()
 
     def update_spritesheets(self):
-        self.camera.tilesheet = self.parser.parse_tileset(f'{self.tileset}.png')
+        self.camera.set_tilesheet(self.parser.parse_tileset(f'{self.tileset}.png'))
 
     def set_level(self, id: int):
         if id < 1:
@@ -339,7 +484,7 @@ class Editor:
         self.levelid = id
 
     def new_level(self):
-        self.world.append([])
+        self.world.append(grid.LevelGrid())
         self.level_bg_color.append(DEFAULT_BG_COLOR)
 
     def save_level(self):
@@ -350,71 +495,120 @@ class Editor:
 
     # TOOLS #
     def handle_tools(self):
-        if not self.camera.rect.collidepoint(pygame.mouse.get_pos()): return
-        if self.state != STATE_EDITOR: return
+        mouse = pygame.mouse.get_pos()
+        drawing = self.state == STATE_EDITOR and pygame.mouse.get_pressed()[0]
 
-        mbuttons = pygame.mouse.get_pressed()
+        if drawing:
+            self.stroke_sample(mouse)
 
-        if (mbuttons[0]):
-            match self.tool:
-                case "brush":
-                    self.brush_tool()
-                case "erase":
-                    self.erase_tool()
-    
-    def brush_tool(self):
-        mouse = pygame.mouse.get_pos()
+        self.apply_stroke()
+
+        # after the tools, so the last cells of a stroke join its edit
+        if not drawing:
+            self.stroke.end()
+            self.journal.commit()
+
+    def apply_stroke(self):
+        match self.tool:
+            case "brush":
+                self.brush_tool()
+            case "erase":
+                self.erase_tool()
+
+    def mouse_cell(self, mouse: tuple[int, int]) -> tuple[int, int]:
         n_mouse = (
             mouse[0] - self.camera.camera_position[0] + self.camera.position.x, 
             mouse[1] - self.camera.camera_position[1] + self.camera.position.y
         )
 
-        gridx = int(n_mouse[0] // self.camera.tilesize[0]) + 1
-        gridy = int(n_mouse[1] // self.camera.tilesize[1]) + 1
+        return (int(n_mouse[0] // self.camera.tilesize[0]), int(n_mouse[1] // self.camera.tilesize[1]))
 
-        map_len = len(self.levelmap)
+    def stroke_sample(self, mouse: tuple[int, int]):
+        if self.state != STATE_EDITOR or self.tool not in ("brush", "erase"): return
 
-        # create rows if absent
-        if gridy > map_len:
-            for i in range(gridy - map_len):
-                self.levelmap.append([])
+        # leaving the view lifts the pen, so coming back does not draw a
+        # line across whatever was outside
+        if not self.camera.rect.collidepoint(mouse):
+            self.stroke.end()
+            return
 
-        row_len = len(self.levelmap[gridy - 1])
+        self.stroke.add(self.mouse_cell(mouse))
 
-        # create columns if absent
-        if gridx > row_len:
-            for i in range(gridx - row_len):
-                self.levelmap[gridy - 1].append(0)
+    def paint_cells(self, xs, ys, tile: int):
+        """
+            Sets the cells as one edit and refreshes what they touch.
+        """
 
-        # place tiles
-        self.levelmap[gridy - 1][gridx - 1] = self.selected_tile
+        extent = self.levelmap.extent()
+        xs, ys, old = self.levelmap.set_many(xs, ys, tile)
 
-    def erase_tool(self):
-        mouse = pygame.mouse.get_pos()
-        n_mouse = (
-            mouse[0] - self.camera.camera_position[0] + self.camera.position.x, 
-            mouse[1] - self.camera.camera_position[1] + self.camera.position.y
-        )
+        self.journal.record(self.levelmap, xs, ys, old, tile, extent)
+        self.refresh_cells(xs, ys, False)
+
+    def refresh_cells(self, xs, ys, region: bool):
+        """
+            Re-renders and re-classifies the changed cells, ``region``
+            re-classifies their whole bounding box in one pass instead.
+        """
+
+        if len(xs) == 0: return
+
+        self.camera.mark_cells(xs, ys)
+
+        if self.partition is None or self.partition.grid is not self.levelmap: return
 
-        gridx = int(n_mouse[0] // self.camera.tilesize[0]) + 1
-        gridy = int(n_mouse[1] // self.camera.tilesize[1]) + 1
+        if region:
+            self.partition.update_region(int(xs.min()), int(xs.max()) + 1, int(ys.min()), int(ys.max()) + 1)
+        else:
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                self.partition.update(x, y)
+
+    def refresh_deltas(self, deltas):
+        xs, ys = deltas["x"].astype(numpy.int64), deltas["y"].astype(numpy.int64)
+
+        # fills cover most of their box, strokes only a thin line of it
+        area = (int(xs.max()) - int(xs.min()) + 1) * (int(ys.max()) - int(ys.min()) + 1)
+        self.refresh_cells(xs, ys, len(xs) * 4 >= area)
+
+    def undo(self):
+        deltas = self.journal.undo(self.levelmap)
+        if deltas is None: return
 
-        map_len = len(self.levelmap)
+        self.refresh_deltas(deltas)
 
-        # create rows if absent
-        if gridy > map_len:
-            for i in range(gridy - map_len):
-                self.levelmap.append([])
+    def redo(self):
+        deltas = self.journal.redo(self.levelmap)
+        if deltas is None: return
 
-        row_len = len(self.levelmap[gridy - 1])
+        self.refresh_deltas(deltas)
 
-        # create columns if absent
-        if gridx > row_len:
-            for i in range(gridx - row_len):
-                self.levelmap[gridy - 1].append(0)
+    def brush_tool(self):
+        # the stroke since last frame, the grid grows to fit
+        self.paint_cells(*self.stroke.take(), self.selected_tile)
+
+    def erase_tool(self):
+        self.paint_cells(*self.stroke.take(), 0)
 
-        # place tiles
-        self.levelmap[gridy - 1][gridx - 1] = 0
+    def bucket_tool(self, mouse: tuple[int, int]):
+        if self.state != STATE_EDITOR or self.tool != "bucket": return
+        if not self.camera.rect.collidepoint(mouse): return
+
+        gridx, gridy = self.mouse_cell(mouse)
+
+        # open areas stop at the level or the view, whichever is larger,
+        # and never spread further than FILL_RANGE from the click
+        x_start, x_end, y_start, y_end = self.camera.visible_range()
+        bounds = (
+            max(0, gridx - FILL_RANGE[0]), min(max(self.levelmap.width, x_end), gridx + FILL_RANGE[0]),
+            max(0, gridy - FILL_RANGE[1]), min(max(self.levelmap.height, y_end), gridy + FILL_RANGE[1])
+        )
+
+        extent = self.levelmap.extent()
+        xs, ys, old = self.levelmap.fill(gridx, gridy, self.selected_tile, bounds)
+
+        self.journal.record(self.levelmap, xs, ys, old, self.selected_tile, extent)
+        self.journal.commit()
+        self.refresh_cells(xs, ys, True)
 
     # UI #
     def create_ui(self):
@@ -459,13 +653,31 @@ class Editor:
             )           
         )
 
-        size = self.ui_tileset.rect.width / 20
-        set_height = size * len(self.camera.tilesheet) / 20
+        size, left, top, offset = self.palette_layout()
+        first, last = self.palette_rows()
 
-        right = self.ui_tileset.rect.right
-        left = self.ui_tileset.rect.left
-        top = self.ui_tileset.rect.top
-        bottom = self.ui_tileset.rect.bottom
+        if last >= first:
+            palette = self.get_palette()
+            area = pygame.Rect(0, int(first * size), palette.get_width(), int((last + 1) * size) - int(first * size))
+
+            self.window.blit(palette, (int(left + size / 2), int(top + 60 - offset + first * size)), area)
+
+        # selected tile
+        row, column = divmod(self.selected_tile - 1, PALETTE_COLUMNS)
+
+        if first <= row <= last:
+            self.window.blit(
+                pygame.transform.scale(self.ui_selected, (size, size)),
+                (left + size / 2 + column * size, top + 60 - offset + row * size)
+            )
+
+    def palette_layout(self) -> tuple[float, float, float, float]:
+        """
+            ``-> (tile size, left, top, scroll offset)`` of the tileset palette
+        """
+
+        size = self.ui_tileset.rect.width / (PALETTE_COLUMNS + 1)
+        set_height = size * len(self.camera.tilesheet) / (PALETTE_COLUMNS + 1)
 
         scroll_speed = 400
         offset = self.tileset_scroll * scroll_speed
@@ -475,26 +687,47 @@ class Editor:
 
             self.tileset_scroll = offset / scroll_speed
 
-        x, y = left + size / 2, top + 60 - offset
+        return (size, self.ui_tileset.rect.left, self.ui_tileset.rect.top, offset)
 
-        for tile in self.camera.tilesheet:
-            if (x > right - size / 2):
-                x = left + size / 2
-                y += size
+    def palette_rows(self) -> tuple[int, int]:
+        """
+            First and last palette row fully inside the panel.
+        """
 
-            if y < top + size or y > bottom - size: 
-                x += size
-                continue
+        size, left, top, offset = self.palette_layout()
+        bottom = self.ui_tileset.rect.bottom
+        rows = -(-len(self.camera.tilesheet) // PALETTE_COLUMNS)
 
-            self.window.blit(pygame.transform.scale(tile, (size, size))
-                             , (x, y))
-            
-            # selected tile
-            if tile == self.camera.tilesheet[self.selected_tile - 1]: 
-                self.window.blit(pygame.transform.scale(self.ui_selected, (size, size))
-                             , (x, y))
-            
-            x += size
+        first = max(math.ceil((size - 60 + offset) / size), 0)
+        last = min(math.floor((bottom - size - top - 60 + offset) / size), rows - 1)
+
+        return (first, last)
+
+    def get_palette(self) -> pygame.Surface:
+        """
+            Every tile of the tilesheet scaled into one surface, rebuilt when
+            the tilesheet or panel size changes.
+        """
+
+        size = self.ui_tileset.rect.width / (PALETTE_COLUMNS + 1)
+        key = (id(self.camera.tilesheet), size)
+
+        if self.palette is not None and self.palette_key == key:
+            return self.palette
+
+        tilesheet = self.camera.tilesheet
+        rows = -(-len(tilesheet) // PALETTE_COLUMNS)
+
+        self.palette = pygame.Surface(
+            (int(PALETTE_COLUMNS * size), int(rows * size)), pygame.SRCALPHA
+        )
+        self.palette_key = key
+
+        for i, tile in enumerate(tilesheet):
+            row, column = divmod(i, PALETTE_COLUMNS)
+            self.palette.blit(pygame.transform.scale(tile, (size, size)), (int(column * size), int(row * size)))
+
+        return self.palette
 
     def scroll_tileset(self, y):
         if self.state != STATE_TILESET: return
@@ -506,37 +739,20 @@ class Editor:
     def select_tileset(self):
         if self.state != STATE_TILESET: return
         
-        size = self.ui_tileset.rect.width / 20
-        set_height = size * len(self.camera.tilesheet) / 20
-
-        right = self.ui_tileset.rect.right
-        left = self.ui_tileset.rect.left
-        top = self.ui_tileset.rect.top
-        bottom = self.ui_tileset.rect.bottom
+        size, left, top, offset = self.palette_layout()
+        first, last = self.palette_rows()
 
-        scroll_speed = 400
-        offset = self.tileset_scroll * scroll_speed
-
-        if offset > set_height:
-            offset = set_height
-
-            self.tileset_scroll = offset / scroll_speed
+        mouse = pygame.mouse.get_pos()
 
-        x, y = left + size / 2, top + 60 - offset
+        column = math.floor((mouse[0] - left - size / 2) / size)
+        row = math.floor((mouse[1] - top - 60 + offset) / size)
 
-        for tile in self.camera.tilesheet:
-            if (x > right - size / 2):
-                x = left + size / 2
-                y += size
+        if not (0 <= column < PALETTE_COLUMNS and first <= row <= last): return
 
-            if y < top + size or y > bottom - size: 
-                x += size
-                continue
-        
-            if pygame.Rect(x, y, size, size).collidepoint(pygame.mouse.get_pos()):
-                self.selected_tile = self.camera.tilesheet.index(tile) + 1
+        tile = row * PALETTE_COLUMNS + column
 
-            x += size
+        if tile < len(self.camera.tilesheet):
+            self.selected_tile = tile + 1
 
     def handle_buttons(self):
         self.file_button.update_buttons()
@@ -546,16 +762,30 @@ class Editor:
             self.file_button.buttons[0].click = False
             self.b_import()
 
+            # the file dialog covered the window
+            self.dirty.invalidate()
+
         if self.file_button.buttons[1].clicked():
             self.file_button.click = False
             self.file_button.buttons[1].click = False
             self.b_export()
 
+            # the file dialog covered the window
+            self.dirty.invalidate()
+
         if self.file_button.buttons[2].clicked():
             self.file_button.click = False
             self.file_button.buttons[2].click = False
             self.b_new()
 
+    def debug_overlay(self):
+        if not self.debug: return
+
+        # rebuilt when the level changes
+        if self.partition is None or self.partition.grid is not self.levelmap:
+            self.partition = partition.LevelPartition(self.levelmap)
+
+        self.camera.debug_draw_partition(self.partition.state)
 
     def show_cursor(self):
         if self.state != STATE_EDITOR: return
@@ -593,14 +823,14 @@ class Editor:
         self.camera.surface.blit(tool, (n_mouse[0] - self.camera.position.x, n_mouse[1] - self.camera.position.y))
 
     def ui_position(self):
-        text = self.font.render(f"({int(self.camera.position[0])}, {int(self.camera.position[1])})", True, (255, 255, 255))
+        text = ui.text_cache.render(self.font, f"({int(self.camera.position[0])}, {int(self.camera.position[1])})", (255, 255, 255))
 
-        self.window.blit(text, (10, 10))
+        self.dirty.add(self.window.blit(text, (10, 10)))
 
     def ui_level(self):
-        text = self.font.render(f"Level: {self.levelid}", True, (255, 255, 255))
+        text = ui.text_cache.render(self.font, f"Level: {self.levelid}", (255, 255, 255))
 
-        self.window.blit(text, (10, 50)) 
+        self.dirty.add(self.window.blit(text, (10, 50)))
 
     # UTIL #
     def percent(self, value, percentage):
@@ -3,26 +3,39 @@ import numpy
 import os
 
 import scripts.util.time as time
+import scripts.misc.collision as collision
 
 class Player:
-    def __init__(self, tilesize: pygame.Vector2, collision_map: list) -> None:
+    def __init__(self, tilesize: pygame.Vector2, collision_map: list, controls,
+                 collision_grid: collision.CollisionGrid = None) -> None:
         self.rect = pygame.Rect((0, 0), tilesize)
 
         self.position = pygame.Vector2(0, 0)
+        self.previous_position = pygame.Vector2(0, 0)
         self.world_pos = pygame.Vector2(0, 0)
+
+        # pixels per second, tuned as pixels per tick
         self.velocity = pygame.Vector2(0, 0)
-        self.max_velocity = pygame.Vector2(12, 30)
+        self.max_velocity = pygame.Vector2(12, 30) * time.TICK_RATE
         
-        self.acceleration = tilesize.x * 0.2
-        self.friction = tilesize.x * 0.1
+        self.acceleration = tilesize.x * 0.2 * time.TICK_RATE
+        self.friction = tilesize.x * 0.1 * time.TICK_RATE
 
-        self.gravity_c = tilesize.y * 0.15
+        self.gravity_c = tilesize.y * 0.15 * time.TICK_RATE
         self.min_jump = tilesize.y * 2
         self.max_jump = tilesize.y * 6
         self.run_jump_bonus = tilesize.y * 1
         self.on_ground = False
 
+        # built here unless the level already has one
+        if collision_grid is None:
+            collision_grid = collision.CollisionGrid(collision_map, tilesize)
+
         self.collision_map = collision_map
+        self.collision_grid = collision_grid
+
+        # polled by Game once per step
+        self.controls = controls
 
 
         self.powerup = 0    # 0: None, 1: Big, 2: Fire
@@ -44,10 +57,20 @@ class Player:
         self.powerup = 0
         self.star = 0
         self.position = spawnpoint
+        self.previous_position = pygame.Vector2(spawnpoint)
+
+    def set_collision(self, collision_map: list, collision_grid: collision.CollisionGrid):
+        self.collision_map = collision_map
+        self.collision_grid = collision_grid
 
     def update(self):
+        self.previous_position.update(self.position)
+
         self.movement()
 
+    def interpolate(self, alpha: float) -> pygame.Vector2:
+        return self.previous_position.lerp(self.position, alpha)
+
     def render(self, tilesize: pygame.Vector2) -> pygame.Surface:
         return pygame.transform.scale(self.sprites["0"]["Idle"], tilesize)
 
@@ -61,8 +84,6 @@ class Player:
         self.add_friction()
         self.limit_velocity()
 
-        self.collision()
-
         self.apply_velocity()
         self.update_rect()
 
@@ -83,11 +104,11 @@ class Player:
                 self.velocity.x -= self.friction * time.deltaTime
 
     def apply_velocity(self):
-        self.position += self.velocity
+        # move and resolve one axis at a time
+        self.collision_x()
+        self.collision_y()
 
     def limit_velocity(self):
-        print(time.deltaTime)
-
         if self.velocity.x > self.max_velocity.x:
             self.velocity.x = self.max_velocity.x
         if self.velocity.x < -self.max_velocity.x:
@@ -96,19 +117,31 @@ class Player:
         if self.velocity.y > self.max_velocity.y:
             self.velocity.y = self.max_velocity.y
 
-    def collision(self):
-        # temporary
-        if self.position.y + self.velocity.y > 500:
-            self.position.y = 500
+    def collision_x(self):
+        new_x, hit = self.collision_grid.sweep_x(
+            self.position.x, self.position.y, self.rect.width, self.rect.height, self.velocity.x * time.deltaTime
+        )
+
+        self.position.x = new_x
+
+        if hit:
+            self.velocity.x = 0
+
+    def collision_y(self):
+        new_y, hit = self.collision_grid.sweep_y(
+            self.position.x, self.position.y, self.rect.width, self.rect.height, self.velocity.y * time.deltaTime
+        )
+
+        self.on_ground = hit and self.velocity.y > 0
+        self.position.y = new_y
+
+        if hit:
             self.velocity.y = 0
-        #
 
     def input(self):
-        keys = pygame.key.get_pressed()
-
-        if keys[pygame.K_a]:
+        if self.controls.pressed(pygame.K_a):
             self.velocity.x -= self.acceleration * time.deltaTime
-        if keys[pygame.K_d]:
+        if self.controls.pressed(pygame.K_d):
             self.velocity.x += self.acceleration * time.deltaTime
 
     def update_rect(self):
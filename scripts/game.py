@@ -3,8 +3,13 @@ import json
 import os
 
 import scripts.misc.world as world
+import scripts.misc.prefetch as prefetch
 import scripts.camera as camera
 import scripts.util.time as time
+import scripts.util.controls as controls
+import scripts.util.replay as replay
+import scripts.util.profiler as profiler
+import scripts.util.dirty as dirty
 import scripts.entity.player as player
 import scripts.entity.enemy as enemy
 import scripts.entity.powerup as powerup
@@ -19,15 +24,59 @@ ICON_PATH = "assets/resource/icon.png"
 ICON = pygame.image.load(ICON_PATH)
 
 DEFAULT_BG_COLOR = (0, 80, 100)
+WINDOW_BG_COLOR = (130, 130, 130)
+
+# render frame cap, 0 = uncapped
+FPS = 0
+# frame cap while nothing changes on screen
+IDLE_FPS = 30
+
+PROFILER_KEY = pygame.K_F3
+# profile report written on exit when set, .csv or .json
+PROFILE_ENV = "SMM_PROFILE"
+
+# init
+pygame.font.init()
 
 
 def start():
-    game = Game()
+    game = Game(profile_path = os.environ.get(PROFILE_ENV), persist_optimized = True)
     game.start()
 
+def simulate(ticks: int, script: list = None, world_name: str = "w1") -> "Game":
+    """
+        Runs ``ticks`` simulation steps headless, feeding ``script``
+        (one collection of held keys per step) as input.
+    """
+
+    game = Game(world_name, headless = True, input_source = controls.ScriptedControls(script or []))
+    game.simulate(ticks)
+
+    return game
+
+def play_recording(path: str, world_name: str = "w1", trace: list = None) -> "Game":
+    """
+        Replays a recording headless at full speed, optionally appending
+        ``(x, y, velocity_x, velocity_y)`` of the player to ``trace`` every step.
+    """
+
+    recording = replay.ReplayControls.load(path)
+
+    game = Game(world_name, headless = True, input_source = recording)
+    game.simulate(len(recording.masks), recording.dt, trace)
+
+    return game
+
 
 class Game:
-    def __init__(self) -> None:
+    def __init__(self, world_name: str = "w1", headless: bool = False, input_source = None, record_path: str = None, profile_path: str = None,
+                 persist_optimized: bool = False) -> None:
+        # headless games never present a frame
+        self.headless = headless
+
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
         self.window = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("SMM: Pygame Remastered")
         pygame.display.set_icon(ICON)
@@ -37,12 +86,24 @@ class Game:
         self.worldparser = world.WorldParser()
         self.run = True
 
-        self.world = self.worldparser.parse_world("w1")
+        # keyboard unless scripted
+        self.controls = input_source if input_source is not None else controls.KeyboardControls()
+
+        # input of every step is saved here on quit
+        self.record_path = record_path
+
+        if record_path is not None:
+            self.controls = replay.InputRecorder(self.controls)
+
+        # timing report (.json / .csv) is written here on quit
+        self.profile_path = profile_path
+        self.font = pygame.font.SysFont("arial.ttf", 24)
+
+        # optimized levels are written next to the world on quit
+        self.world = self.worldparser.parse_world(world_name, persist_optimized)
         self.levelid = 1
 
         self.level_bg = self.world.get_level_bg(self.levelid)
-        self.map = self.world.get_level_layout(self.levelid)
-        self.map_collide, self.map_nocollide = self.world.optimize_level(self.map)
 
         self.tileset = "smb_map"
         self.objset = "smb_obj"
@@ -50,8 +111,22 @@ class Game:
         self.tilesheet = self.parser.parse_tileset(f"{self.tileset}.png")
         self.objsheet = None
         self.camera = camera.Camera(self.window, (WIDTH, HEIGHT), self.tilesheet, False)
+        self.camera_previous = pygame.Vector2(self.camera.position)
+
+        # regions drawn over the camera last frame
+        self.dirty = dirty.DirtyRects((WIDTH, HEIGHT))
+        self.player_rect = None
+        self.overlay_rect = None
+        self.idle = False
+
+        # levels are prepared in the background
+        self.prefetcher = prefetch.LevelPrefetcher(self.world, self.camera.tilesize)
+
+        level = self.prefetcher.take(self.levelid)
+        self.load_level(level)
+        self.prefetcher.prefetch(self.levelid + 1)
 
-        self.player = player.Player(self.camera.tilesize, self.map_collide)
+        self.player = player.Player(self.camera.tilesize, self.map_collide, self.controls, level["collision"])
         self.entities = []
 
 
@@ -61,6 +136,16 @@ class Game:
         # start loop
         self.gameloop()
 
+        if self.record_path is not None:
+            self.controls.save(self.record_path, time.FIXED_DT)
+
+        if self.profile_path is not None:
+            profiler.profiler.dump(self.profile_path)
+            print(f"Profile written to '{self.profile_path}'")
+
+        self.prefetcher.shutdown()
+        self.world.save_optimized()
+
         # quit pygame
         pygame.quit()
 
@@ -72,53 +157,142 @@ class Game:
                 if event.type == pygame.QUIT:
                     self.run = False
 
-            # update
-            self.update()
+                if event.type == pygame.KEYUP and event.key == PROFILER_KEY:
+                    profiler.profiler.overlay = not profiler.profiler.overlay
+
+                # the window was uncovered, its contents are stale
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.dirty.invalidate()
+
+            # update at a fixed rate
+            for i in range(time.fixed_steps(self.clock, IDLE_FPS if self.idle else FPS)):
+                self.update()
         
             # draw screen
-            self.render()
+            if not self.headless:
+                self.idle = not self.render(time.alpha)
 
-    def render(self):
-        self.window.fill((130, 130, 130))
+    def simulate(self, ticks: int, dt: float = time.FIXED_DT, trace: list = None):
+        """
+            Steps the simulation ``ticks`` times as fast as possible,
+            without rendering or waiting on the clock.
+        """
+
+        time.deltaTime = dt
+
+        for i in range(ticks):
+            self.update()
+
+            if trace is not None:
+                trace.append((*self.player.position, *self.player.velocity))
+
+    def render(self, alpha: float = 1) -> bool:
+        """
+            Draws and presents the regions that changed since the last frame.\n
+            ``-> False`` if nothing changed and the frame was skipped
+        """
+
+        # draw between the last two simulation steps
+        cam_position = self.camera.position
+        self.camera.position = self.camera_previous.lerp(cam_position, alpha)
 
         self.camera.render(self.map, self.level_bg)
-        self.window.blit(self.camera.surface, self.camera.rect)
+
+        player_pos = self.player.interpolate(alpha) - self.camera.position
+        player_rect = pygame.Rect(player_pos, self.camera.tilesize).inflate(2, 2)
+
+        # idle, nothing to present
+        if not (self.camera.changed or self.dirty or self.overlay_rect or profiler.profiler.overlay
+                or player_rect != self.player_rect):
+            self.camera.position = cam_position
+            return False
+
+        if self.camera.changed or self.dirty.full:
+            self.window.fill(WINDOW_BG_COLOR)
+            self.window.blit(self.camera.surface, self.camera.rect)
+            self.dirty.add(self.camera.rect)
+        else:
+            for rect in (self.player_rect, self.overlay_rect):
+                if rect is not None: self.restore(rect)
 
         # player
-        self.window.blit(self.player.render(self.camera.tilesize), self.player.position)
+        with profiler.scope("player.render"):
+            self.window.blit(self.player.render(self.camera.tilesize), player_pos)
+
+        self.player_rect = player_rect
+        self.dirty.add(player_rect)
+
+        self.camera.position = cam_position
+
+        self.overlay_rect = profiler.profiler.draw(self.window, self.font, (10, 10))
+
+        if self.overlay_rect is not None:
+            self.dirty.add(self.overlay_rect)
 
-        pygame.display.update()
+        with profiler.scope("display.update"):
+            self.dirty.present()
+
+        return True
+
+    def restore(self, rect: pygame.Rect):
+        """
+            Redraws the camera under ``rect`` without re-rendering it.
+        """
+
+        # fill does not shrink rects hanging off the window, clip first
+        rect = rect.clip(self.window.get_rect())
+
+        self.window.fill(WINDOW_BG_COLOR, rect)
+        self.dirty.add(rect)
+
+        rect = rect.clip(self.camera.rect)
+        self.window.blit(self.camera.surface, rect, rect.move(-self.camera.rect.left, -self.camera.rect.top))
 
     def update(self):
-        time.update_dt(self.clock)
-        self.player.update()
+        with profiler.scope("game.update"):
+            self.controls.poll()
+
+            self.camera_previous.update(self.camera.position)
 
-        self.cam_move()
+            self.player.update()
+
+            self.cam_move()
 
     def set_level(self, id: int):
         self.levelid = id
 
         self.level_bg = self.world.get_level_bg(id)
 
-        self.map = self.world.get_level_layout(id)
-        self.map_collide, self.map_nocollide = self.world.optimize_level(self.map)
+        # ready if the prefetch finished, loaded now otherwise
+        level = self.prefetcher.take(id)
+        self.load_level(level)
+        self.player.set_collision(level["collide"], level["collision"])
+
+        self.prefetcher.prefetch(id + 1)
+
+    def load_level(self, level: dict):
+        self.map = level["layout"]
+        self.map_collide, self.map_nocollide = level["collide"], level["nocollide"]
+
+        self.camera.prime_chunks(self.map, level["chunks"], level["chunk_size"])
+
+        # decode only the tiles the level uses
+        self.camera.preload_tiles(self.map.ids())
 
     def start_level(self):
         pass
 
     def update_spritesheets(self):
-        self.camera.tilesheet = self.parser.parse_tileset(f'{self.tileset}.png')
+        self.camera.set_tilesheet(self.parser.parse_tileset(f'{self.tileset}.png'))
 
     def cam_move(self):
-        keys = pygame.key.get_pressed()
-
-        if keys[pygame.K_RIGHT]:
+        if self.controls.pressed(pygame.K_RIGHT):
             self.camera.position.x += 10
-        if keys[pygame.K_LEFT]:
+        if self.controls.pressed(pygame.K_LEFT):
             self.camera.position.x -= 10
-        if keys[pygame.K_DOWN]:
+        if self.controls.pressed(pygame.K_DOWN):
             self.camera.position.y += 10
-        if keys[pygame.K_UP]:
+        if self.controls.pressed(pygame.K_UP):
             self.camera.position.y -= 10
 
     # UTIL #
@@ -0,0 +1,159 @@
+import os
+import time
+import hashlib
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+
+import scripts.misc.grid as grid
+import scripts.misc.worldfile as worldfile
+
+AUTOSAVE_FOLDER = os.path.join("assets", "cache", "autosave")
+
+# seconds between autosaves
+AUTOSAVE_INTERVAL = 30
+
+
+def autosave_path(name: str, folder: str = AUTOSAVE_FOLDER) -> str:
+    """
+        One autosave file per world name.\n
+        ``-> path``
+    """
+
+    name = "".join(char if char.isalnum() or char in "-_" else "_" for char in name)
+
+    return os.path.join(folder, (name or "untitled") + worldfile.EXTENSION)
+
+
+class Autosave:
+    """
+        Saves the world being edited on a worker thread.\n
+        The main thread only copies levels edited since the last save, the
+        worker hashes them and compresses the ones whose content changed.
+        ``worldfile.write_world`` writes through a temp file, so the last
+        autosave stays readable if the editor dies while saving.\n
+        Nothing is written until a level was edited, so opening a world and
+        quitting leaves its last autosave alone.
+    """
+
+    def __init__(self, folder: str = AUTOSAVE_FOLDER, interval: float = AUTOSAVE_INTERVAL) -> None:
+        self.folder = folder
+        self.interval = interval
+        self.last_save = time.monotonic()
+
+        self.executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "autosave")
+        self.future = None
+
+        # level id -> (grid, version) of the last snapshot
+        self.versions = {}
+        # level id -> LevelGrid copy
+        self.snapshots = {}
+        # level id -> (content hash, blob), only touched by the worker
+        self.blobs = {}
+        self.written = None
+
+    def due(self) -> bool:
+        """
+            ``True`` once the interval passed and no save is running.
+        """
+
+        return not self.busy() and time.monotonic() - self.last_save >= self.interval
+
+    def busy(self) -> bool:
+        if self.future is None: return False
+        if not self.future.done(): return True
+
+        error = self.future.exception()
+        if error is not None:
+            print(f"Autosave failed: {error}")
+
+        self.future = None
+        return False
+
+    def save(self, world_data: dict):
+        """
+            Snapshots ``world_data`` (same shape as ``worldfile.write_world``
+            takes, with ``LevelGrid`` layouts) and writes it in the background.
+        """
+
+        self.last_save = time.monotonic()
+
+        # grids start at version 0 when created or loaded
+        if all(grid.LevelGrid.from_layout(level["layout"]).version == 0 for level in world_data["levels"].values()):
+            return
+
+        levels = {}
+
+        for level_id, level in world_data["levels"].items():
+            layout = grid.LevelGrid.from_layout(level["layout"])
+            last = self.versions.get(level_id)
+
+            # replaced or edited since the last snapshot
+            if last is None or last[0] is not layout or last[1] != layout.version:
+                self.versions[level_id] = (layout, layout.version)
+                self.snapshots[level_id] = layout.copy()
+
+            levels[level_id] = {
+                "background-color": tuple(level["background-color"]),
+                "layout": self.snapshots[level_id]
+            }
+
+        for level_id in set(self.versions) - set(levels):
+            del self.versions[level_id]
+            del self.snapshots[level_id]
+
+        self.future = self.executor.submit(
+            self.write, world_data["name"], world_data["tileset"], world_data["objset"], levels
+        )
+
+    def write(self, name: str, tileset: str, objset: str, levels: dict):
+        blobs = {}
+        changed = False
+
+        for level_id, level in levels.items():
+            level_grid = level["layout"]
+            data = worldfile.level_bytes(level_grid)
+
+            digest = hashlib.blake2b(digest_size = 16)
+            digest.update(f"{level_grid.width}x{level_grid.height}".encode())
+            digest.update(data)
+            digest = digest.digest()
+
+            cached = self.blobs.get(level_id)
+
+            if cached is not None and cached[0] == digest:
+                blobs[level_id] = cached[1]
+                continue
+
+            blobs[level_id] = worldfile.encode_level(level_grid)
+            self.blobs[level_id] = (digest, blobs[level_id])
+            changed = True
+
+        for level_id in set(self.blobs) - set(levels):
+            del self.blobs[level_id]
+
+        # nothing new since the last file
+        written = (name, tileset, objset, tuple((level_id, level["background-color"]) for level_id, level in levels.items()))
+        if not changed and written == self.written: return
+
+        path = autosave_path(name, self.folder)
+
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        worldfile.write_world(path, name, tileset, objset, levels, blobs)
+
+        self.written = written
+
+    def shutdown(self, world_data: dict = None):
+        """
+            Waits for the running save, then saves ``world_data`` one last
+            time if it was edited.
+        """
+
+        if self.future is not None:
+            concurrent.futures.wait([self.future])
+            self.busy()
+
+        if world_data is not None:
+            self.save(world_data)
+
+        self.executor.shutdown(wait = True)
+        self.busy()
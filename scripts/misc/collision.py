@@ -0,0 +1,106 @@
+import pygame
+import numpy
+import math
+
+# boxes are shrunk by this on the axis they don't move along,
+# so touching a tile edge does not count as overlapping it
+EPSILON = 0.001
+
+
+class CollisionGrid:
+    """
+        Solid tiles indexed by grid cell.\n
+        Queries only look at the cells a box covers, so their cost does not
+        depend on the size of the level.
+    """
+
+    def __init__(self, collision_map, tilesize: pygame.Vector2) -> None:
+        # (tile_id, x, y) rows, as returned by World.optimize_level
+        tiles = numpy.asarray(collision_map, dtype=numpy.int64).reshape(-1, 3)
+
+        width = int(tiles[:, 1].max()) + 1 if len(tiles) else 0
+        height = int(tiles[:, 2].max()) + 1 if len(tiles) else 0
+
+        self.solid = numpy.zeros((height, width), dtype=bool)
+        self.solid[tiles[:, 2], tiles[:, 1]] = True
+
+        self.tilesize = pygame.Vector2(tilesize)
+
+    def cells(self, x: float, y: float, w: float, h: float) -> tuple[int, int, int, int]:
+        """
+            Cell range covered by a box as ``(x_start, x_end, y_start, y_end)``,
+            end exclusive and clamped to the grid.
+        """
+
+        height, width = self.solid.shape
+
+        x_start = min(max(math.floor(x / self.tilesize.x), 0), width)
+        x_end = min(max(math.ceil((x + w) / self.tilesize.x), 0), width)
+        y_start = min(max(math.floor(y / self.tilesize.y), 0), height)
+        y_end = min(max(math.ceil((y + h) / self.tilesize.y), 0), height)
+
+        return (x_start, x_end, y_start, y_end)
+
+    def query(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        """
+            Solid tiles overlapping ``rect``.
+        """
+
+        x_start, x_end, y_start, y_end = self.cells(*rect)
+        ys, xs = numpy.nonzero(self.solid[y_start:y_end, x_start:x_end])
+
+        return [
+            pygame.Rect(
+                (x + x_start) * self.tilesize.x, (y + y_start) * self.tilesize.y,
+                self.tilesize.x, self.tilesize.y
+            )
+            for x, y in zip(xs.tolist(), ys.tolist())
+        ]
+
+    def sweep_x(self, x: float, y: float, w: float, h: float, dx: float) -> tuple[float, bool]:
+        """
+            Moves a box by ``dx`` and stops it at the first solid column.\n
+            ``-> (new_x, hit)``
+        """
+
+        if dx == 0: return (x, False)
+
+        new_x = x + dx
+
+        if dx > 0:
+            x_start, x_end, y_start, y_end = self.cells(x + w, y + EPSILON, new_x - x, h - EPSILON * 2)
+        else:
+            x_start, x_end, y_start, y_end = self.cells(new_x, y + EPSILON, x - new_x, h - EPSILON * 2)
+
+        hits = numpy.flatnonzero(self.solid[y_start:y_end, x_start:x_end].any(axis=0)).tolist()
+
+        if len(hits) == 0: return (new_x, False)
+
+        if dx > 0:
+            return ((x_start + hits[0]) * self.tilesize.x - w, True)
+
+        return ((x_start + hits[-1] + 1) * self.tilesize.x, True)
+
+    def sweep_y(self, x: float, y: float, w: float, h: float, dy: float) -> tuple[float, bool]:
+        """
+            Moves a box by ``dy`` and stops it at the first solid row.\n
+            ``-> (new_y, hit)``
+        """
+
+        if dy == 0: return (y, False)
+
+        new_y = y + dy
+
+        if dy > 0:
+            x_start, x_end, y_start, y_end = self.cells(x + EPSILON, y + h, w - EPSILON * 2, new_y - y)
+        else:
+            x_start, x_end, y_start, y_end = self.cells(x + EPSILON, new_y, w - EPSILON * 2, y - new_y)
+
+        hits = numpy.flatnonzero(self.solid[y_start:y_end, x_start:x_end].any(axis=1)).tolist()
+
+        if len(hits) == 0: return (new_y, False)
+
+        if dy > 0:
+            return ((y_start + hits[0]) * self.tilesize.y - h, True)
+
+        return ((y_start + hits[-1] + 1) * self.tilesize.y, True)
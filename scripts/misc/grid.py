@@ -0,0 +1,292 @@
+import numpy
+
+# smallest allocated grid, in tiles
+MIN_CAPACITY = (16, 16)
+
+
+class LevelGrid:
+    """
+        Level layout stored in a 2D ``uint16`` array.\n
+        Rows keep their own length so ragged layouts survive a round trip,
+        cells past the end of a row are always ``0``.\n
+        Indexing (``grid[y][x]``, ``len(grid)``, iteration) behaves like the
+        old list of lists layout.
+    """
+
+    def __init__(self, width: int = 0, height: int = 0) -> None:
+        self.width = 0
+        self.height = 0
+
+        self.data = numpy.zeros(
+            (max(height, MIN_CAPACITY[1]), max(width, MIN_CAPACITY[0])),
+            dtype=numpy.uint16
+        )
+        self.row_lengths = numpy.zeros(self.data.shape[0], dtype=numpy.uint32)
+
+        # bumped on every edit, 0 until the first one
+        self.version = 0
+
+        self.resize(width, height)
+        self.version = 0
+
+    @classmethod
+    def from_layout(cls, layout: list):
+        if isinstance(layout, LevelGrid):
+            return layout
+
+        height = len(layout)
+        width = max((len(row) for row in layout), default=0)
+
+        grid = cls(width, height)
+
+        for y, row in enumerate(layout):
+            grid.data[y, :len(row)] = row
+            grid.row_lengths[y] = len(row)
+
+        return grid
+
+    def copy(self):
+        grid = LevelGrid(self.width, self.height)
+        grid.data[:self.height, :self.width] = self.array()
+        grid.row_lengths[:self.height] = self.row_lengths[:self.height]
+        grid.version = self.version
+
+        return grid
+
+    def to_layout(self) -> list:
+        return [self.data[y, :self.row_lengths[y]].tolist() for y in range(self.height)]
+
+    # LIST COMPATIBILITY #
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> numpy.ndarray:
+        if y < 0: y += self.height
+        if y < 0 or y >= self.height:
+            raise IndexError("LevelGrid row out of range")
+
+        return self.data[y, :self.row_lengths[y]]
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self.data[y, :self.row_lengths[y]]
+
+    # ACCESS #
+    def get(self, x: int, y: int) -> int:
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return 0
+
+        return int(self.data[y, x])
+
+    def set(self, x: int, y: int, value: int):
+        self.grow(x + 1, y + 1)
+
+        self.data[y, x] = value
+
+        if x >= self.row_lengths[y]:
+            self.row_lengths[y] = x + 1
+
+        self.version += 1
+
+    def set_many(self, xs, ys, value) -> tuple:
+        """
+            Sets every ``(xs[i], ys[i])`` to ``value`` as one edit, the grid
+            grows once for the whole batch. ``value`` is one tile or one per cell.\n
+            ``-> (xs, ys, old)`` of the cells that changed
+        """
+
+        xs = numpy.asarray(xs, dtype=numpy.int64)
+        ys = numpy.asarray(ys, dtype=numpy.int64)
+        value = numpy.broadcast_to(numpy.asarray(value, dtype=numpy.uint16), xs.shape)
+
+        # cells past the grid read as air
+        old = numpy.zeros(len(xs), dtype=numpy.uint16)
+        inside = (xs < self.width) & (ys < self.height)
+        old[inside] = self.data[ys[inside], xs[inside]]
+
+        changed = old != value
+        xs, ys, old, value = xs[changed], ys[changed], old[changed], value[changed]
+
+        if len(xs) == 0: return (xs, ys, old)
+
+        self.grow(int(xs.max()) + 1, int(ys.max()) + 1)
+
+        self.data[ys, xs] = value
+        numpy.maximum.at(self.row_lengths, ys, (xs + 1).astype(numpy.uint32))
+
+        self.version += 1
+
+        return (xs, ys, old)
+
+    def fill(self, x: int, y: int, value: int, bounds: tuple = None) -> tuple:
+        """
+            Flood fill of the area connected to ``(x, y)`` that holds the same
+            tile. Works on runs of cells per row, linked to the runs they touch
+            in the next row, so nothing recurses or loops per cell.\n
+            ``bounds`` ``(x_start, x_end, y_start, y_end)`` limits the area and
+            defaults to the grid, cells past the grid count as air.\n
+            ``-> (xs, ys, old)`` of the filled cells, like ``set_many``
+        """
+
+        unchanged = (numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.uint16))
+
+        if bounds is None:
+            bounds = (0, self.width, 0, self.height)
+
+        x_start, x_end, y_start, y_end = max(bounds[0], 0), bounds[1], max(bounds[2], 0), bounds[3]
+
+        if not (x_start <= x < x_end and y_start <= y < y_end): return unchanged
+
+        target = self.get(x, y)
+        if target == value: return unchanged
+
+        # spare capacity is all air, so the region can extend past the grid
+        self.reserve(x_end, y_end)
+
+        view = self.data[y_start:y_end, x_start:x_end]
+        mask = view == target
+
+        # number the runs of target cells in row order
+        starts = mask.copy()
+        starts[:, 1:] &= ~mask[:, :-1]
+
+        run_id = numpy.cumsum(starts, axis=None, dtype=numpy.int32).reshape(mask.shape) - 1
+        count = int(run_id[-1, -1]) + 1
+
+        # runs touching the run below them, both ways. Two runs overlap in a
+        # single span that begins where a run starts in either row
+        below = mask[:-1] & mask[1:]
+        below &= starts[:-1] | starts[1:]
+
+        upper, lower = run_id[:-1][below], run_id[1:][below]
+        source = numpy.concatenate((upper, lower))
+        dest = numpy.concatenate((lower, upper))
+
+        order = numpy.argsort(source, kind="stable")
+        dest = dest[order]
+        offsets = numpy.searchsorted(source[order], numpy.arange(count + 1))
+
+        # walk the runs reachable from the seed, a whole frontier at a time
+        reached = numpy.zeros(count, dtype=bool)
+        frontier = numpy.array([run_id[y - y_start, x - x_start]])
+        reached[frontier] = True
+
+        while len(frontier):
+            first = offsets[frontier]
+            lengths = offsets[frontier + 1] - first
+
+            index = numpy.repeat(first - numpy.cumsum(lengths) + lengths, lengths) + numpy.arange(lengths.sum())
+            frontier = numpy.unique(dest[index])
+            frontier = frontier[~reached[frontier]]
+
+            reached[frontier] = True
+
+        filled = mask & reached[run_id]
+        view[filled] = value
+
+        ys, xs = numpy.nonzero(filled)
+        xs += x_start
+        ys += y_start
+
+        if value != 0:
+            self.grow(int(xs.max()) + 1, int(ys.max()) + 1)
+
+            # last filled cell of each row
+            row_end = numpy.where(
+                filled.any(axis=1), x_start + filled.shape[1] - numpy.argmax(filled[:, ::-1], axis=1), 0
+            )
+
+            lengths = self.row_lengths[y_start:y_end]
+            numpy.maximum(lengths, row_end.astype(numpy.uint32), out=lengths)
+
+        self.version += 1
+
+        return (xs, ys, numpy.full(len(xs), target, dtype=numpy.uint16))
+
+    def rows(self, start: int, end: int) -> numpy.ndarray:
+        return self.data[max(start, 0):min(end, self.height), :self.width]
+
+    def columns(self, start: int, end: int) -> numpy.ndarray:
+        return self.data[:self.height, max(start, 0):min(end, self.width)]
+
+    def array(self) -> numpy.ndarray:
+        return self.data[:self.height, :self.width]
+
+    def ids(self) -> set:
+        """
+            Tile ids used by the level, ``0`` excluded.
+        """
+
+        ids = numpy.unique(self.array())
+
+        return set(ids[ids != 0].tolist())
+
+    def occupied_blocks(self, size: int) -> numpy.ndarray:
+        """
+            ``[by, bx]`` is ``True`` if the ``size`` x ``size`` block holds a tile.
+        """
+
+        height = -(-self.height // size) * size
+        width = -(-self.width // size) * size
+
+        blocks = numpy.zeros((height, width), dtype=bool)
+        blocks[:self.height, :self.width] = self.array() != 0
+
+        return blocks.reshape(height // size, size, width // size, size).any(axis=(1, 3))
+
+    # SIZE #
+    def extent(self) -> tuple:
+        """
+            ``-> (width, height, row lengths)`` to hand back to ``set_extent``
+        """
+
+        return (self.width, self.height, self.row_lengths[:self.height].copy())
+
+    def set_extent(self, extent: tuple):
+        width, height, row_lengths = extent
+
+        self.resize(width, height)
+        self.row_lengths[:height] = row_lengths
+
+    def reserve(self, width: int, height: int):
+        cap_height, cap_width = self.data.shape
+
+        if width <= cap_width and height <= cap_height: return
+
+        # grow in doubling steps
+        while cap_width < width: cap_width *= 2
+        while cap_height < height: cap_height *= 2
+
+        data = numpy.zeros((cap_height, cap_width), dtype=numpy.uint16)
+        data[:self.height, :self.width] = self.array()
+
+        row_lengths = numpy.zeros(cap_height, dtype=numpy.uint32)
+        row_lengths[:self.height] = self.row_lengths[:self.height]
+
+        self.data = data
+        self.row_lengths = row_lengths
+
+    def grow(self, width: int, height: int):
+        """
+            Makes sure the grid is at least ``width`` x ``height``.
+        """
+
+        if width <= self.width and height <= self.height: return
+
+        self.resize(max(width, self.width), max(height, self.height))
+
+    def resize(self, width: int, height: int):
+        self.reserve(width, height)
+
+        # clear cut off cells so they read as air when grown again
+        if width < self.width:
+            self.data[:, width:self.width] = 0
+            numpy.minimum(self.row_lengths, width, out=self.row_lengths)
+        if height < self.height:
+            self.data[height:self.height] = 0
+            self.row_lengths[height:self.height] = 0
+
+        self.width = width
+        self.height = height
+
+        self.version += 1
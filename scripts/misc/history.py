@@ -0,0 +1,164 @@
+import numpy
+
+import scripts.misc.grid as grid
+
+# memory kept for undo and redo, oldest edits go first
+HISTORY_BUDGET = 32 * 1024 * 1024
+
+# one changed cell
+DELTA = numpy.dtype([("x", "<u4"), ("y", "<u4"), ("old", "<u2"), ("new", "<u2")])
+
+
+def entry_bytes(entry: tuple) -> int:
+    level_grid, deltas, before, after = entry
+
+    return deltas.nbytes + before[2].nbytes + after[2].nbytes
+
+
+class EditJournal:
+    """
+        Undo/redo journal storing every edit as an array of changed cells
+        instead of level snapshots, so undoing costs as much as the edit.\n
+        Cells recorded until ``commit`` form one edit, e.g. a whole brush
+        stroke. Each level grid has its own undo order, and undoing gives
+        the grid back the size it had before the edit.
+    """
+
+    def __init__(self, budget: int = HISTORY_BUDGET) -> None:
+        self.budget = budget
+        self.size = 0
+
+        # (level_grid, deltas, extent before, extent after), oldest first
+        self.undo_stack = []
+        self.redo_stack = []
+
+        self.pending = []
+        self.pending_grid = None
+        self.pending_extent = None
+
+    def record(self, level_grid: grid.LevelGrid, xs, ys, old, new, extent: tuple):
+        """
+            Adds changed cells to the open edit, ``new`` is one tile or one per cell.
+            ``extent`` is ``level_grid.extent()`` from before the cells changed.
+        """
+
+        if len(xs) == 0: return
+
+        if level_grid is not self.pending_grid:
+            self.commit()
+
+        deltas = numpy.empty(len(xs), dtype=DELTA)
+        deltas["x"] = xs
+        deltas["y"] = ys
+        deltas["old"] = old
+        deltas["new"] = new
+
+        if not self.pending:
+            self.pending_extent = extent
+
+        self.pending.append(deltas)
+        self.pending_grid = level_grid
+
+    def commit(self):
+        """
+            Closes the open edit.
+        """
+
+        if not self.pending: return
+
+        level_grid = self.pending_grid
+        deltas = self.collapse(numpy.concatenate(self.pending))
+        extent = self.pending_extent
+
+        self.pending = []
+        self.pending_grid = None
+        self.pending_extent = None
+
+        # no cell ends up different, only the growth is left to take back
+        if len(deltas) == 0:
+            level_grid.set_extent(extent)
+            return
+
+        # a new edit replaces what could be redone on that level
+        self.redo_stack = [entry for entry in self.redo_stack if entry[0] is not level_grid]
+
+        self.undo_stack.append((level_grid, deltas, extent, level_grid.extent()))
+        self.size = sum(entry_bytes(entry) for entry in self.undo_stack + self.redo_stack)
+
+        while self.size > self.budget and self.undo_stack:
+            self.size -= entry_bytes(self.undo_stack.pop(0))
+
+    def undo(self, level_grid: grid.LevelGrid) -> numpy.ndarray:
+        """
+            Reverts the last edit made to ``level_grid``.\n
+            ``-> deltas`` of the reverted edit, ``None`` if there is none
+        """
+
+        self.commit()
+
+        entry = self.take(self.undo_stack, level_grid)
+        if entry is None: return None
+
+        deltas = entry[1]
+
+        level_grid.set_many(deltas["x"], deltas["y"], deltas["old"])
+        level_grid.set_extent(entry[2])
+        self.redo_stack.append(entry)
+
+        return deltas
+
+    def redo(self, level_grid: grid.LevelGrid) -> numpy.ndarray:
+        """
+            Applies the last undone edit of ``level_grid`` again.\n
+            ``-> deltas`` of the edit, ``None`` if there is none
+        """
+
+        self.commit()
+
+        entry = self.take(self.redo_stack, level_grid)
+        if entry is None: return None
+
+        deltas = entry[1]
+
+        level_grid.set_many(deltas["x"], deltas["y"], deltas["new"])
+        level_grid.set_extent(entry[3])
+        self.undo_stack.append(entry)
+
+        return deltas
+
+    def collapse(self, deltas: numpy.ndarray) -> numpy.ndarray:
+        """
+            Merges cells changed more than once in an edit into one delta
+            from their first old to their last new tile, and drops cells
+            that end where they started.\n
+            ``-> deltas`` with one entry per cell
+        """
+
+        keys = deltas["y"].astype(numpy.int64) * (int(deltas["x"].max()) + 1) + deltas["x"]
+
+        # stable, so each cell's deltas stay in the order they were made
+        order = numpy.argsort(keys, kind="stable")
+        keys = keys[order]
+
+        starts = numpy.flatnonzero(numpy.r_[True, keys[1:] != keys[:-1]])
+        ends = numpy.r_[starts[1:], len(keys)] - 1
+
+        merged = deltas[order[starts]]
+        merged["new"] = deltas["new"][order[ends]]
+
+        return merged[merged["old"] != merged["new"]]
+
+    def take(self, stack: list, level_grid: grid.LevelGrid) -> tuple:
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] is level_grid:
+                return stack.pop(i)
+
+        return None
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.pending = []
+        self.pending_grid = None
+        self.pending_extent = None
+        self.size = 0
@@ -0,0 +1,101 @@
+import numpy
+
+import scripts.misc.grid as grid
+
+# cell states
+AIR = 0
+COLLIDABLE = 1
+ENCLOSED = 2
+
+
+class LevelPartition:
+    """
+        The ``World.optimize_level`` split of a ``LevelGrid`` kept as a cell
+        state array.\n
+        An edit can only change the tile and its four neighbours, so
+        ``update`` re-classifies just those cells.
+    """
+
+    def __init__(self, level_grid: grid.LevelGrid) -> None:
+        self.grid = level_grid
+        self.state = numpy.zeros(level_grid.data.shape, dtype=numpy.uint8)
+
+        self.rebuild()
+
+    def rebuild(self):
+        self.state = numpy.zeros(self.grid.data.shape, dtype=numpy.uint8)
+
+        solid = self.grid.array() != 0
+
+        enclosed = numpy.zeros_like(solid)
+        enclosed[1:-1, 1:-1] = (
+            solid[:-2, 1:-1] & solid[2:, 1:-1] &
+            solid[1:-1, :-2] & solid[1:-1, 2:]
+        )
+
+        view = self.state[:self.grid.height, :self.grid.width]
+        view[solid] = COLLIDABLE
+        view[solid & enclosed] = ENCLOSED
+
+    def fit(self):
+        """
+            Follows the grid's growth.
+        """
+
+        if self.state.shape != self.grid.data.shape:
+            state = numpy.zeros(self.grid.data.shape, dtype=numpy.uint8)
+            height, width = self.state.shape
+            state[:height, :width] = self.state
+            self.state = state
+
+    def update(self, x: int, y: int):
+        """
+            Call after the tile at ``(x, y)`` changed.
+        """
+
+        self.fit()
+
+        for cx, cy in ((x, y), (x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            self.classify(cx, cy)
+
+    def update_region(self, x_start: int, x_end: int, y_start: int, y_end: int):
+        """
+            Call after the tiles in a region changed, e.g. by ``LevelGrid.fill``.
+        """
+
+        self.fit()
+
+        # the region and its border
+        x_start, y_start = max(x_start - 1, 0), max(y_start - 1, 0)
+        # past the grid too, an undo may have shrunk it
+        x_end, y_end = min(x_end + 1, self.state.shape[1]), min(y_end + 1, self.state.shape[0])
+
+        if x_start >= x_end or y_start >= y_end: return
+
+        # one more cell around for the neighbour checks, cells past the
+        # grid are always air
+        top, left = min(y_start, 1), min(x_start, 1)
+        around = self.grid.data[y_start - top:y_end + 1, x_start - left:x_end + 1] != 0
+
+        padded = numpy.zeros((y_end - y_start + 2, x_end - x_start + 2), dtype=bool)
+        padded[1 - top:1 - top + around.shape[0], 1 - left:1 - left + around.shape[1]] = around
+
+        solid = padded[1:-1, 1:-1]
+        enclosed = padded[:-2, 1:-1] & padded[2:, 1:-1] & padded[1:-1, :-2] & padded[1:-1, 2:]
+
+        view = self.state[y_start:y_end, x_start:x_end]
+        view[:] = AIR
+        view[solid] = COLLIDABLE
+        view[solid & enclosed] = ENCLOSED
+
+    def classify(self, x: int, y: int):
+        if x < 0 or y < 0 or x >= self.state.shape[1] or y >= self.state.shape[0]: return
+
+        get = self.grid.get
+
+        if get(x, y) == 0:
+            self.state[y, x] = AIR
+        elif get(x, y - 1) and get(x, y + 1) and get(x - 1, y) and get(x + 1, y):
+            self.state[y, x] = ENCLOSED
+        else:
+            self.state[y, x] = COLLIDABLE
@@ -0,0 +1,59 @@
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+import scripts.misc.collision as collision
+import scripts.camera as camera
+
+
+class LevelPrefetcher:
+    """
+        Prepares levels on a worker thread while another one plays.\n
+        Only pure data is built off the main thread: the layout, its
+        optimized split, the collision grid and the chunk occupancy.
+    """
+
+    def __init__(self, world, tilesize: pygame.Vector2, workers: int = 1) -> None:
+        self.world = world
+        self.tilesize = pygame.Vector2(tilesize)
+
+        self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "prefetch")
+        self.pending = {}   # id -> Future
+
+    def prepare(self, id: int) -> dict:
+        layout = self.world.get_level_layout(id)
+        collide, nocollide = self.world.get_level_optimized(id)
+        chunk_size = camera.chunk_tiles(self.tilesize)
+
+        return {
+            "layout": layout,
+            "collide": collide,
+            "nocollide": nocollide,
+            "collision": collision.CollisionGrid(collide, self.tilesize),
+            "chunks": layout.occupied_blocks(chunk_size),
+            "chunk_size": chunk_size
+        }
+
+    def prefetch(self, id: int):
+        if str(id) not in self.world.index or id in self.pending: return
+
+        self.pending[id] = self.executor.submit(self.prepare, id)
+
+    def take(self, id: int) -> dict:
+        """
+            Prepared level ``id``. Waits for a running prefetch rather than
+            building the level twice, builds it on the spot if there is none.
+        """
+
+        future = self.pending.pop(id, None)
+
+        if future is not None:
+            return future.result()
+
+        return self.prepare(id)
+
+    def shutdown(self):
+        for future in self.pending.values():
+            future.cancel()
+
+        self.pending.clear()
+        self.executor.shutdown(wait = False)
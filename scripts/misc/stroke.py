@@ -0,0 +1,65 @@
+import numpy
+
+
+def line(x0: int, y0: int, x1: int, y1: int) -> list[tuple[int, int]]:
+    """
+        Cells on the segment between two cells, both ends included
+        (Bresenham).
+    """
+
+    cells = []
+
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+    error = dx + dy
+
+    while True:
+        cells.append((x0, y0))
+
+        if x0 == x1 and y0 == y1: return cells
+
+        double = error * 2
+
+        if double >= dy:
+            error += dy
+            x0 += sx
+        if double <= dx:
+            error += dx
+            y0 += sy
+
+
+class Stroke:
+    """
+        Cells touched by a mouse stroke.\n
+        Every sample is joined to the previous one so fast strokes leave no
+        gaps, ``take`` hands the cells over as one batch.
+    """
+
+    def __init__(self) -> None:
+        self.last = None
+        self.cells = set()
+
+    def add(self, cell: tuple[int, int]):
+        if self.last is None:
+            self.cells.add(cell)
+        else:
+            self.cells.update(line(*self.last, *cell))
+
+        self.last = cell
+
+    def end(self):
+        """
+            Lifts the pen, the next sample starts a new segment.
+        """
+
+        self.last = None
+
+    def take(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+            ``-> (xs, ys)`` of the cells touched since the last call
+        """
+
+        cells = numpy.array(list(self.cells), dtype=numpy.int64).reshape(-1, 2)
+        self.cells.clear()
+
+        return (cells[:, 0], cells[:, 1])
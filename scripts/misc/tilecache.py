@@ -0,0 +1,166 @@
+import pygame
+import struct
+import mmap
+import os
+
+CACHE_PATH = "assets/cache/tilesets"
+
+MAGIC = b"SMMT"
+VERSION = 1
+
+# magic, version, source mtime (ns), width, height
+HEADER = struct.Struct("<4sHqII")
+
+
+class TilesetRegistry:
+    """
+        Process-wide cache of tileset sheets and their tiles.\n
+        Sheets are memoized by ``(path, mtime)`` and tiles by
+        ``(path, mtime, tilesize)``. Decoded pixels are also written to
+        ``cache_path`` as raw RGBA so later launches skip PNG decoding.
+    """
+
+    def __init__(self, cache_path: str = CACHE_PATH) -> None:
+        self.cache_path = cache_path
+
+        self.sheets = {}
+        self.tilesets = {}
+
+    def get_tiles(self, path: str, tilesize: int, split) -> list:
+        """
+            Tiles of the sheet at ``path``, ``split(sheet, tilesize)`` builds
+            them on a miss.
+        """
+
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns, tilesize)
+
+        tiles = self.tilesets.get(key)
+
+        if tiles is None:
+            tiles = split(self.get_sheet(path), tilesize)
+
+            self.forget(self.tilesets, path)
+            self.tilesets[key] = tiles
+
+        return tiles
+
+    def get_sheet(self, path: str) -> pygame.Surface:
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns)
+
+        sheet = self.sheets.get(key)
+
+        if sheet is None:
+            sheet = self.read_cache(*key)
+
+            if sheet is None:
+                sheet = pygame.image.load(path)
+                self.write_cache(sheet, *key)
+
+            self.forget(self.sheets, path)
+            self.sheets[key] = sheet
+
+        return sheet
+
+    def forget(self, cache: dict, path: str):
+        # drop entries of older versions of the file
+        for key in [key for key in cache if key[0] == path]:
+            del cache[key]
+
+    # DISK #
+    def cache_file(self, path: str) -> str:
+        return os.path.join(self.cache_path, os.path.splitext(os.path.basename(path))[0] + ".rgba")
+
+    def read_cache(self, path: str, mtime: int) -> pygame.Surface:
+        try:
+            with open(self.cache_file(path), "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                    magic, version, source_mtime, width, height = HEADER.unpack_from(data)
+
+                    if magic != MAGIC or version != VERSION or source_mtime != mtime:
+                        return None
+
+                    if len(data) != HEADER.size + width * height * 4:
+                        return None
+
+                    return pygame.image.frombytes(data[HEADER.size:], (width, height), "RGBA")
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def write_cache(self, sheet: pygame.Surface, path: str, mtime: int):
+        file_path = self.cache_file(path)
+        temp_path = file_path + ".tmp"
+
+        try:
+            os.makedirs(self.cache_path, exist_ok = True)
+
+            with open(temp_path, "wb") as file:
+                file.write(HEADER.pack(MAGIC, VERSION, mtime, *sheet.get_size()))
+                file.write(pygame.image.tobytes(sheet, "RGBA"))
+
+            os.replace(temp_path, file_path)
+        except OSError:
+            # cache is optional
+            pass
+
+
+class LazyTilesheet:
+    """
+        List of the tiles in a sheet that only cuts and converts a tile the
+        first time it is indexed.
+    """
+
+    def __init__(self, sheet: pygame.Surface, tilesize: int) -> None:
+        self.sheet = sheet
+        self.tilesize = tilesize
+
+        self.columns = sheet.get_width() // tilesize
+        self.length = self.columns * (sheet.get_height() // tilesize)
+
+        self.tiles = [None] * self.length
+        self.indices = {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+
+        tile = self.tiles[index]
+
+        if tile is None:
+            tile = self.decode(index % self.length)
+
+        return tile
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def index(self, tile: pygame.Surface) -> int:
+        index = self.indices.get(id(tile))
+
+        if index is None or self.tiles[index] is not tile:
+            raise ValueError("tile is not in tilesheet")
+
+        return index
+
+    def decode(self, index: int) -> pygame.Surface:
+        x = index % self.columns * self.tilesize
+        y = index // self.columns * self.tilesize
+
+        tile = self.sheet.subsurface((x, y, self.tilesize, self.tilesize))
+
+        # display format blits faster, needs a window
+        if pygame.display.get_surface() is not None:
+            tile = tile.convert_alpha()
+
+        self.tiles[index] = tile
+        self.indices[id(tile)] = index
+
+        return tile
+
+
+registry = TilesetRegistry()
@@ -1,4 +1,51 @@
 import pygame
+from collections import OrderedDict
+
+# rendered strings kept by each TextCache
+TEXT_CACHE_SIZE = 256
+
+
+class TextCache:
+    """
+        LRU cache of rendered text, keyed by ``(font, text, color, antialias)``.\n
+        HUD text only changes when the value behind it does, every other
+        frame reuses the surface.
+    """
+
+    def __init__(self, size: int = TEXT_CACHE_SIZE) -> None:
+        self.size = size
+        self.cache = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+        key = (font, text, tuple(color), antialias)
+        surface = self.cache.get(key)
+
+        if surface is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return surface
+
+        self.misses += 1
+
+        surface = font.render(text, antialias, key[2])
+        self.cache[key] = surface
+
+        # evict least recently used
+        if len(self.cache) > self.size:
+            self.cache.popitem(last = False)
+
+        return surface
+
+    def clear(self):
+        self.cache.clear()
+
+
+# shared by all HUD text
+text_cache = TextCache()
+
 
 class UIElement:
     def __init__(self, rect: pygame.Rect) -> None:
@@ -84,6 +131,14 @@ class UIButton:
 
         self.click = rect.collidepoint(mouse) and m1
 
+    def area(self) -> pygame.Rect:
+        size = self.scale
+
+        if size is None:
+            size = self.img.get_size()
+
+        return pygame.Rect(self.pos, size)
+
     def draw(self, surface: pygame.Surface):
         if not self.active: return
 
@@ -118,6 +173,14 @@ class UIButtonList(UIButton):
             for button in self.buttons:
                 button.draw(surface)
 
+    def area(self) -> pygame.Rect:
+        rect = super().area()
+
+        if self.click:
+            rect.unionall_ip([button.area() for button in self.buttons])
+
+        return rect
+
     def update(self):
         if not self.active: return
 
@@ -1,23 +1,66 @@
 import pygame
+import numpy
 from PIL import Image
 import os
 import json
+import threading
+import hashlib
+from collections import OrderedDict
+
+import scripts.misc.grid as grid
+import scripts.misc.tilecache as tilecache
+import scripts.misc.worldfile as worldfile
 
 TILESET_PATH = "assets/resource/textures/spritesheets/tileset"
 OBJSET_PATH = "assets/resource/textures/spritesheets/objset"
 WORLDS_PATH = "assets/worlds"
 
+# tileset cell size, in pixels
+TILESIZE = 16
+
+# levels kept decoded, the current and the next one
+LEVEL_CACHE_SIZE = 2
+
+# optimized levels kept in memory, by layout hash
+OPTIMIZE_CACHE_SIZE = 64
+OPTIMIZE_CACHE_EXTENSION = ".opt.npz"
+
 class SpriteSheetParser:
     def __init__(self) -> None:
         pass
 
     def parse_tileset(self, name: str) -> list:
+        """
+            Returns the tiles of a sheet as a ``tilecache.LazyTilesheet``
+            shared through ``tilecache.registry``.\n
+            Falls back to ``parse_tileset_pil`` if pygame can't load the file.
+        """
+
+        path = os.path.join(TILESET_PATH, name)
+
+        try:
+            return tilecache.registry.get_tiles(path, TILESIZE, tilecache.LazyTilesheet)
+        except pygame.error:
+            return self.parse_tileset_pil(name)
+
+    def split_sheet(self, sheet: pygame.Surface, tilesize: int) -> list:
+        tileset = []
+
+        for y in range(sheet.get_height() // tilesize):
+            for x in range(sheet.get_width() // tilesize):
+                tileset.append(
+                    sheet.subsurface((x * tilesize, y * tilesize, tilesize, tilesize))
+                )
+
+        return tileset
+
+    def parse_tileset_pil(self, name: str) -> list:
         tileset = []
 
         path = os.path.abspath(os.path.join(TILESET_PATH, name))
         image = Image.open(path)
 
-        tilesize = 16
+        tilesize = TILESIZE
 
         for y in range(image.height // tilesize):
             for x in range(image.width // tilesize):
@@ -44,26 +87,174 @@ class SpriteSheetParser:
 
         return objset
 
+class OptimizeCache:
+    """
+        ``optimize_level_vectorized`` results keyed by a hash of the layout
+        content, so an unchanged level is only split once.
+    """
+
+    def __init__(self, size: int = OPTIMIZE_CACHE_SIZE) -> None:
+        self.size = size
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, level_grid: grid.LevelGrid) -> str:
+        digest = hashlib.blake2b(digest_size = 16)
+        digest.update(numpy.array((level_grid.width, level_grid.height), dtype="<u4").tobytes())
+        digest.update(level_grid.row_lengths[:level_grid.height].astype("<u4").tobytes())
+        digest.update(level_grid.array().astype("<u2").tobytes())
+
+        return digest.hexdigest()
+
+    def get(self, level_layout, optimize) -> tuple[str, tuple[numpy.ndarray, numpy.ndarray]]:
+        """
+            ``-> (key, optimize(level_layout))``, computed on a miss.
+        """
+
+        level_grid = grid.LevelGrid.from_layout(level_layout)
+        key = self.key(level_grid)
+
+        with self.lock:
+            result = self.results.get(key)
+
+            if result is not None:
+                self.results.move_to_end(key)
+                return (key, result)
+
+        result = optimize(level_grid)
+        self.put(key, result)
+
+        return (key, result)
+
+    def put(self, key: str, result: tuple):
+        with self.lock:
+            self.results[key] = result
+
+            while len(self.results) > self.size:
+                self.results.popitem(last = False)
+
+    def save(self, path: str, keys):
+        arrays = {}
+
+        with self.lock:
+            for key in keys:
+                if key in self.results:
+                    arrays[f"{key}_collide"], arrays[f"{key}_nocollide"] = self.results[key]
+
+        if not arrays: return
+
+        temp_path = path + ".tmp.npz"
+        numpy.savez(temp_path, **arrays)
+        os.replace(temp_path, path)
+
+    def load(self, path: str):
+        try:
+            with numpy.load(path) as data:
+                for name in data.files:
+                    key, kind = name.rsplit("_", 1)
+
+                    if kind == "collide":
+                        self.put(key, (data[name], data[f"{key}_nocollide"]))
+        except (OSError, ValueError, KeyError):
+            print(f"Could not read optimized levels from '{path}'.")
+
+
+optimize_cache = OptimizeCache()
+
+
 class World:
-    def __init__(self, name: str, tileset: str, objset: str, levels: dict) -> None:
+    """
+        Keeps an index of the levels and only materializes the layout (and
+        its optimized split) of recently used levels.\n
+        ``levels`` maps ids to ``{"background-color", "layout"}``. Layouts are
+        kept compressed, or fetched with ``loader(id)`` when it is given.
+    """
+
+    def __init__(self, name: str, tileset: str, objset: str, levels: dict, loader = None, optimized_path: str = None) -> None:
         self.name = name
         self.tileset = tileset
         self.objset = objset
 
-        self.levels = levels
+        self.index = {}
+        self.blobs = {}     # id -> (zlib blob, width, height)
+        self.loader = loader
+
+        for id, level in levels.items():
+            self.index[id] = {"background-color": level["background-color"]}
+
+            if "layout" in level:
+                level_grid = grid.LevelGrid.from_layout(level["layout"])
+                self.blobs[id] = (worldfile.encode_level(level_grid), level_grid.width, level_grid.height)
+
         self.length = len(levels)
 
+        # id -> {"layout", "optimized"}, least recently used first
+        self.cache = OrderedDict()
+        self.cache_size = LEVEL_CACHE_SIZE
+
+        # levels may be loaded from a prefetch thread
+        self.lock = threading.RLock()
+
+        # optimized levels are persisted here if set
+        self.optimized_path = optimized_path
+        self.optimized_keys = set()
+
     def get_level(self, id: int):
         if id > self.length:
             return None
         
-        return self.levels[str(id)]
+        return {
+            "background-color": self.get_level_bg(id),
+            "layout": self.get_level_layout(id)
+        }
+
+    def load_level(self, id) -> dict:
+        id = str(id)
+
+        with self.lock:
+            level = self.cache.get(id)
+
+            if level is not None:
+                self.cache.move_to_end(id)
+                return level
+
+            if self.loader is not None:
+                layout = self.loader(id)
+            else:
+                layout = worldfile.decode_level(*self.blobs[id])
+
+            level = self.cache[id] = {"layout": layout, "optimized": None}
+
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last = False)
+
+            return level
     
-    def get_level_layout(self, id):
-        return self.levels[str(id)]["layout"]
+    def get_level_layout(self, id) -> grid.LevelGrid:
+        return self.load_level(id)["layout"]
+
+    def get_level_optimized(self, id) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+            ``optimize_level_vectorized`` of a level, shared through
+            ``optimize_cache`` by layout content.
+        """
+
+        with self.lock:
+            level = self.load_level(id)
+
+            if level["optimized"] is None:
+                key, level["optimized"] = optimize_cache.get(level["layout"], self.optimize_level_vectorized)
+                self.optimized_keys.add(key)
+
+            return level["optimized"]
+
+    def save_optimized(self):
+        if self.optimized_path is None: return
+
+        optimize_cache.save(self.optimized_path, self.optimized_keys)
     
     def get_level_bg(self, id):
-        return self.levels[str(id)]["background-color"]
+        return self.index[str(id)]["background-color"]
 
     def optimize_level(self, level_layout: list) -> tuple[list, list]:
         """
@@ -130,26 +321,82 @@ class World:
 
         return (collidable, non_collidable)
 
+    def optimize_level_vectorized(self, level_layout) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+            Same split as ``optimize_level`` computed with array masks.\n
+            Both results are ``(n, 3)`` arrays of ``(tile_id, x, y)`` rows in
+            the same order as ``optimize_level``.\n
+            ``-> tuple[numpy.ndarray, numpy.ndarray]``
+        """
+
+        # cells past the end of a ragged row are 0, which reads as air
+        tiles = grid.LevelGrid.from_layout(level_layout).array()
+        solid = tiles != 0
+
+        # neighbour is solid, out of bounds is air
+        enclosed = numpy.zeros_like(solid)
+        enclosed[1:-1, 1:-1] = (
+            solid[:-2, 1:-1] & solid[2:, 1:-1] &
+            solid[1:-1, :-2] & solid[1:-1, 2:]
+        )
+
+        collidable = solid & ~enclosed
+        non_collidable = solid & enclosed
+
+        return (self.tile_rows(tiles, collidable), self.tile_rows(tiles, non_collidable))
+
+    def tile_rows(self, tiles: numpy.ndarray, mask: numpy.ndarray) -> numpy.ndarray:
+        ys, xs = numpy.nonzero(mask)
+
+        return numpy.stack((tiles[ys, xs], xs, ys), axis=1).astype(numpy.int32)
+
 
 class WorldParser:
     def __init__(self) -> None:
         pass
 
-    def parse_world(self, world_name: str) -> World:
-        filedata = open(os.path.join(WORLDS_PATH, f"{world_name}.json"), "r")
+    def parse_world(self, world_name: str, persist_optimized: bool = False) -> World:
+        # binary worlds are preferred over JSON
+        binary_path = os.path.join(WORLDS_PATH, f"{world_name}{worldfile.EXTENSION}")
+        loader = None
 
-        try:
-            world_data = json.loads(filedata.read())
-        except json.decoder.JSONDecodeError:
-            print(f"Could not read world file: JSON file is empty.")
-            return
+        if os.path.exists(binary_path):
+            # only the index is read, levels are loaded on demand
+            world_data = worldfile.read_index(binary_path)
+            entries = world_data["levels"]
+
+            loader = lambda id: worldfile.read_level(binary_path, entries[id])
+        else:
+            world_data = self.read_json(os.path.join(WORLDS_PATH, f"{world_name}.json"))
+
+            if world_data is None: return
         
         name = world_data["name"]
         tileset = world_data["tileset"]
         objset = world_data["objset"]
         levels = world_data["levels"]
         
-        world = World(name, tileset, objset, levels)
+        optimized_path = None
+
+        if persist_optimized:
+            optimized_path = os.path.join(WORLDS_PATH, f"{world_name}{OPTIMIZE_CACHE_EXTENSION}")
+
+            if os.path.exists(optimized_path):
+                optimize_cache.load(optimized_path)
+        
+        world = World(name, tileset, objset, levels, loader, optimized_path)
 
         return world
-    
\ No newline at end of file
+
+    def read_json(self, path: str) -> dict:
+        filedata = open(path, "r")
+
+        try:
+            world_data = json.loads(filedata.read())
+        except json.decoder.JSONDecodeError:
+            print(f"Could not read world file: JSON file is empty.")
+            return
+        finally:
+            filedata.close()
+
+        return world_data
@@ -0,0 +1,169 @@
+"""
+    Binary world format (``.smmw``).\n
+    Layout: header, level index, then one zlib compressed blob per level
+    holding its row lengths (``uint32``) and tile grid (``uint16``),
+    little endian. The index stores every blob's offset so a single level
+    can be read without touching the others.\n
+    ``python -m scripts.misc.worldfile world.json [world.smmw]`` converts a JSON world.
+"""
+
+import struct
+import zlib
+import json
+import sys
+import os
+import numpy
+
+import scripts.misc.grid as grid
+
+EXTENSION = ".smmw"
+
+MAGIC = b"SMMW"
+VERSION = 1
+
+# magic, version, level count
+HEADER = struct.Struct("<4sHI")
+# level id, blob offset, blob size, width, height, background color
+INDEX_ENTRY = struct.Struct("<IQIII3B")
+STRING_LENGTH = struct.Struct("<H")
+
+
+def level_bytes(level_grid: grid.LevelGrid) -> bytes:
+    """
+        Uncompressed contents of a level blob.
+    """
+
+    row_lengths = level_grid.row_lengths[:level_grid.height].astype("<u4")
+    tiles = level_grid.array().astype("<u2")
+
+    return row_lengths.tobytes() + tiles.tobytes()
+
+def encode_level(level_grid: grid.LevelGrid) -> bytes:
+    return zlib.compress(level_bytes(level_grid))
+
+def decode_level(blob: bytes, width: int, height: int) -> grid.LevelGrid:
+    data = zlib.decompress(blob)
+
+    level_grid = grid.LevelGrid(width, height)
+    level_grid.row_lengths[:height] = numpy.frombuffer(data, dtype="<u4", count=height)
+    level_grid.data[:height, :width] = numpy.frombuffer(
+        data, dtype="<u2", offset=height * 4
+    ).reshape(height, width)
+
+    return level_grid
+
+
+def write_world(path: str, name: str, tileset: str, objset: str, levels: dict, blobs: dict = None):
+    """
+        Writes ``levels`` (id -> ``{"background-color", "layout"}``) to ``path``
+        through a temp file, so readers never see a half written world.\n
+        ``blobs`` may hold already encoded levels by id, they are written as is.
+    """
+
+    strings = b"".join(
+        STRING_LENGTH.pack(len(value)) + value
+        for value in (name.encode(), tileset.encode(), objset.encode())
+    )
+
+    ids = sorted(levels, key=int)
+    encoded = []
+
+    for id in ids:
+        level_grid = grid.LevelGrid.from_layout(levels[id]["layout"])
+
+        blob = blobs.get(id) if blobs else None
+        if blob is None:
+            blob = encode_level(level_grid)
+
+        encoded.append((id, level_grid.width, level_grid.height, blob))
+
+    offset = HEADER.size + len(strings) + INDEX_ENTRY.size * len(ids)
+    index = b""
+
+    for id, width, height, blob in encoded:
+        index += INDEX_ENTRY.pack(int(id), offset, len(blob), width, height, *levels[id]["background-color"])
+        offset += len(blob)
+
+    temp_path = path + ".tmp"
+
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(ids)))
+        file.write(strings)
+        file.write(index)
+
+        for entry in encoded:
+            file.write(entry[3])
+
+    os.replace(temp_path, path)
+
+def read_index(path: str) -> dict:
+    """
+        Reads only the header and level index.\n
+        ``-> {"name", "tileset", "objset", "levels": {id: entry}}``
+    """
+
+    with open(path, "rb") as file:
+        magic, version, count = HEADER.unpack(file.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{path}' is not a world file")
+
+        strings = []
+
+        for i in range(3):
+            length, = STRING_LENGTH.unpack(file.read(STRING_LENGTH.size))
+            strings.append(file.read(length).decode())
+
+        levels = {}
+
+        for i in range(count):
+            id, offset, size, width, height, *color = INDEX_ENTRY.unpack(file.read(INDEX_ENTRY.size))
+
+            levels[str(id)] = {
+                "offset": offset,
+                "size": size,
+                "width": width,
+                "height": height,
+                "background-color": color
+            }
+
+    return {"name": strings[0], "tileset": strings[1], "objset": strings[2], "levels": levels}
+
+def read_level(path: str, entry: dict) -> grid.LevelGrid:
+    with open(path, "rb") as file:
+        file.seek(entry["offset"])
+        blob = file.read(entry["size"])
+
+    return decode_level(blob, entry["width"], entry["height"])
+
+def read_world(path: str) -> dict:
+    """
+        Reads a whole world, same shape as the JSON format with
+        ``LevelGrid`` layouts.
+    """
+
+    world_data = read_index(path)
+
+    for id, entry in world_data["levels"].items():
+        world_data["levels"][id] = {
+            "background-color": entry["background-color"],
+            "layout": read_level(path, entry)
+        }
+
+    return world_data
+
+
+def convert(json_path: str, out_path: str = None):
+    if out_path is None:
+        out_path = os.path.splitext(json_path)[0] + EXTENSION
+
+    with open(json_path, "r") as file:
+        world_data = json.loads(file.read())
+
+    write_world(out_path, world_data["name"], world_data["tileset"], world_data["objset"], world_data["levels"])
+
+    return out_path
+
+
+if __name__ == "__main__":
+    print(f"Converted to '{convert(*sys.argv[1:3])}'")
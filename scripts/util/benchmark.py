@@ -0,0 +1,208 @@
+"""
+    Performance benchmarks.\n
+    ``python -m scripts.util.benchmark [name ...]``
+"""
+
+import os
+import sys
+import json
+import tempfile
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import scripts.camera as camera
+import scripts.misc.world as world
+import scripts.misc.grid as grid
+import scripts.misc.tilecache as tilecache
+import scripts.misc.worldfile as worldfile
+
+
+def timeit(func, repeat: int) -> float:
+    """
+        Average milliseconds per ``func()`` call.
+    """
+
+    start = perf_counter()
+
+    for i in range(repeat):
+        func()
+
+    return (perf_counter() - start) * 1000 / repeat
+
+
+def generate_level(width: int, height: int) -> list:
+    layout = []
+
+    for y in range(height):
+        if y < height - 4:
+            # scattered floating blocks
+            layout.append([(x * 7 + y * 3) % 11 == 0 and 2 or 0 for x in range(width)])
+        else:
+            layout.append([1] * width)
+
+    return layout
+
+
+def bench_draw_map():
+    pygame.display.init()
+    window = pygame.display.set_mode((1080, 720))
+
+    tilesheet = [pygame.Surface((16, 16), pygame.SRCALPHA) for i in range(4)]
+    for tile in tilesheet:
+        tile.fill((200, 100, 50, 200))
+
+    print("draw_map: frame time by level width")
+
+    for chunked in (False, True):
+        for zoom in (0.5, 0.1):
+            cam = camera.Camera(window, (1080, 720), tilesheet, False)
+            cam.chunked = chunked
+            cam.zoom = zoom
+            cam.calculate_tilesize()
+
+            for width in (30, 1000, 10000):
+                level = generate_level(width, 60)
+
+                def frame():
+                    # render skips frames that did not change
+                    cam.redraw = True
+                    cam.render(level, (0, 0, 0))
+
+                ms = timeit(frame, 200)
+
+                mode = "chunks" if chunked else "tiles"
+                print(f"  {mode:<6} zoom {zoom}, {width:>6} columns: {ms:.3f} ms/frame")
+
+
+def bench_optimize_level():
+    level_world = world.World("bench", "smb_map", "smb_obj", {})
+
+    print("optimize_level: loops vs array masks")
+
+    for width, height in ((200, 20), (2000, 200)):
+        level = generate_level(width, height)
+
+        # ragged rows
+        for y in range(0, height, 3):
+            del level[y][width - y:]
+
+        loops = level_world.optimize_level(level)
+        masks = level_world.optimize_level_vectorized(level)
+
+        assert [tuple(tile) for tile in masks[0].tolist()] == loops[0]
+        assert [tuple(tile) for tile in masks[1].tolist()] == loops[1]
+
+        ms_loops = timeit(lambda: level_world.optimize_level(level), 3)
+        ms_masks = timeit(lambda: level_world.optimize_level_vectorized(level), 3)
+
+        level_grid = grid.LevelGrid.from_layout(level)
+        ms_grid = timeit(lambda: level_world.optimize_level_vectorized(level_grid), 3)
+
+        print(f"  {width}x{height}: loops {ms_loops:.1f} ms, masks {ms_masks:.1f} ms, masks on LevelGrid {ms_grid:.1f} ms")
+
+
+def bench_parse_tileset():
+    parser = world.SpriteSheetParser()
+
+    print("parse_tileset: smb_map.png")
+
+    path = os.path.join(world.TILESET_PATH, "smb_map.png")
+    registry = tilecache.registry
+
+    def cold():
+        registry.sheets.clear()
+        registry.tilesets.clear()
+
+        parser.split_sheet(pygame.image.load(path), world.TILESIZE)
+
+    def warm_disk():
+        registry.sheets.clear()
+        registry.tilesets.clear()
+
+        parser.parse_tileset("smb_map.png")
+
+    ms_pil = timeit(lambda: parser.parse_tileset_pil("smb_map.png"), 5)
+    ms_sheet = timeit(cold, 5)
+
+    parser.parse_tileset("smb_map.png")
+    ms_disk = timeit(warm_disk, 5)
+    ms_memo = timeit(lambda: parser.parse_tileset("smb_map.png"), 5)
+
+    print(f"  PIL crops {ms_pil:.1f} ms, subsurfaces {ms_sheet:.1f} ms")
+    print(f"  disk cache {ms_disk:.1f} ms, registry hit {ms_memo:.3f} ms")
+
+    sheet = registry.get_sheet(path)
+
+    ms_eager = timeit(lambda: parser.split_sheet(sheet, world.TILESIZE), 5)
+    ms_lazy = timeit(lambda: tilecache.LazyTilesheet(sheet, world.TILESIZE)[:12], 5)
+
+    print(f"  all tiles {ms_eager:.2f} ms, lazy with 12 tiles used {ms_lazy:.2f} ms")
+
+
+def bench_world_file():
+    levels = {
+        str(i + 1): {"background-color": [0, 80, 100], "layout": generate_level(2000, 200)}
+        for i in range(10)
+    }
+
+    print("world file: 10 levels of 2000x200")
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "bench.json")
+        binary_path = os.path.join(directory, "bench" + worldfile.EXTENSION)
+
+        with open(json_path, "w") as file:
+            file.write(json.dumps({"name": "bench", "tileset": "smb_map", "objset": "smb_obj", "levels": levels}))
+
+        worldfile.convert(json_path, binary_path)
+
+        def load_json():
+            with open(json_path, "r") as file:
+                json.loads(file.read())
+
+        index = worldfile.read_index(binary_path)
+
+        ms_json = timeit(load_json, 3)
+        ms_binary = timeit(lambda: worldfile.read_world(binary_path), 3)
+        ms_level = timeit(lambda: worldfile.read_level(binary_path, index["levels"]["5"]), 3)
+
+        print(f"  size: JSON {os.path.getsize(json_path) // 1024} KiB, binary {os.path.getsize(binary_path) // 1024} KiB")
+        print(f"  load: JSON {ms_json:.1f} ms, binary {ms_binary:.1f} ms, one binary level {ms_level:.1f} ms")
+
+
+def bench_fill():
+    print("fill: bucket fill of the sky")
+
+    for width, height in ((200, 20), (5000, 200)):
+        for name, level in (("open", [[0] * width for y in range(height)]), ("scattered", generate_level(width, height))):
+            total = 0
+
+            for i in range(3):
+                level_grid = grid.LevelGrid.from_layout(level)
+
+                start = perf_counter()
+                level_grid.fill(1, 0, 3)
+                total += perf_counter() - start
+
+            print(f"  {width}x{height} {name}: {total * 1000 / 3:.1f} ms")
+
+
+BENCHMARKS = {
+    "draw_map": bench_draw_map,
+    "fill": bench_fill,
+    "optimize_level": bench_optimize_level,
+    "parse_tileset": bench_parse_tileset,
+    "world_file": bench_world_file,
+}
+
+
+def main(names: list):
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
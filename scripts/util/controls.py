@@ -0,0 +1,43 @@
+import pygame
+
+
+class KeyboardControls:
+    """
+        Reads the keyboard once per simulation step.
+    """
+
+    def __init__(self) -> None:
+        self.keys = None
+
+    def poll(self):
+        self.keys = pygame.key.get_pressed()
+
+    def pressed(self, key: int) -> bool:
+        return bool(self.keys[key])
+
+
+class ScriptedControls:
+    """
+        Plays back one collection of held keys per simulation step,
+        nothing is held once the script runs out.
+    """
+
+    def __init__(self, script: list) -> None:
+        self.script = script
+        self.tick = 0
+
+        self.keys = frozenset()
+
+    def poll(self):
+        if self.tick < len(self.script):
+            self.keys = frozenset(self.script[self.tick])
+        else:
+            self.keys = frozenset()
+
+        self.tick += 1
+
+    def pressed(self, key: int) -> bool:
+        return key in self.keys
+
+    def finished(self) -> bool:
+        return self.tick >= len(self.script)
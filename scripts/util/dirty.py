@@ -0,0 +1,40 @@
+import pygame
+
+# above this many rects a single bounding rect is presented instead
+MAX_RECTS = 24
+
+
+class DirtyRects:
+    """
+        Screen regions changed this frame, only these are presented.
+    """
+
+    def __init__(self, size: tuple[int, int]) -> None:
+        self.screen = pygame.Rect((0, 0), size)
+        self.rects = []
+
+        # first frame presents everything
+        self.full = True
+
+    def add(self, rect):
+        rect = pygame.Rect(rect).clip(self.screen)
+
+        if rect.width and rect.height:
+            self.rects.append(rect)
+
+    def invalidate(self):
+        self.full = True
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self.rects)
+
+    def present(self):
+        if self.full:
+            pygame.display.update()
+        elif len(self.rects) > MAX_RECTS:
+            pygame.display.update(self.rects[0].unionall(self.rects[1:]))
+        elif self.rects:
+            pygame.display.update(self.rects)
+
+        self.rects = []
+        self.full = False
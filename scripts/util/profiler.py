@@ -0,0 +1,104 @@
+import pygame
+import json
+import csv
+import os
+from collections import deque
+from time import perf_counter
+
+# frames kept per scope
+HISTORY = 300
+
+
+class Scope:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples: deque) -> None:
+        self.samples = samples
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *args):
+        self.samples.append((perf_counter() - self.start) * 1000)
+
+
+class Profiler:
+    """
+        Named timing scopes kept in rolling buffers, in milliseconds.
+    """
+
+    def __init__(self, history: int = HISTORY) -> None:
+        self.history = history
+        self.scopes = {}
+
+        self.overlay = False
+
+    def scope(self, name: str) -> Scope:
+        scope = self.scopes.get(name)
+
+        if scope is None:
+            scope = self.scopes[name] = Scope(deque(maxlen=self.history))
+
+        return scope
+
+    def percentiles(self, name: str) -> tuple[float, float, float]:
+        """
+            ``-> (p50, p95, p99)``
+        """
+
+        samples = sorted(self.scopes[name].samples)
+
+        if not samples: return (0, 0, 0)
+
+        last = len(samples) - 1
+
+        return tuple(samples[round(last * p)] for p in (0.5, 0.95, 0.99))
+
+    def report(self) -> dict:
+        report = {}
+
+        for name in self.scopes:
+            p50, p95, p99 = self.percentiles(name)
+            report[name] = {"p50": p50, "p95": p95, "p99": p99, "samples": len(self.scopes[name].samples)}
+
+        return report
+
+    def dump(self, path: str):
+        report = self.report()
+
+        if os.path.splitext(path)[1] == ".csv":
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(("scope", "p50", "p95", "p99", "samples"))
+
+                for name, values in report.items():
+                    writer.writerow((name, values["p50"], values["p95"], values["p99"], values["samples"]))
+        else:
+            with open(path, "w") as file:
+                json.dump(report, file, indent=4)
+
+    def draw(self, surface: pygame.Surface, font: pygame.font.Font, pos: tuple[int, int]) -> pygame.Rect:
+        """
+            Draws the overlay if enabled, returns the area it covers.
+        """
+
+        if not self.overlay: return None
+
+        x, y = pos
+        area = pygame.Rect(pos, (0, 0))
+
+        for name in self.scopes:
+            p50, p95, p99 = self.percentiles(name)
+            text = font.render(f"{name}: {p50:.2f} / {p95:.2f} / {p99:.2f} ms", True, (255, 255, 255), (0, 0, 0))
+
+            surface.blit(text, (x, y))
+            area.union_ip(text.get_rect(topleft = (x, y)))
+            y += text.get_height()
+
+        return area
+
+profiler = Profiler()
+
+def scope(name: str) -> Scope:
+    return profiler.scope(name)
@@ -0,0 +1,116 @@
+import pygame
+import struct
+import sys
+from array import array
+
+# keys read by Player.input and Game.cam_move, bit i = RECORDED_KEYS[i]
+RECORDED_KEYS = (
+    pygame.K_a, pygame.K_d,
+    pygame.K_RIGHT, pygame.K_LEFT, pygame.K_DOWN, pygame.K_UP
+)
+
+MAGIC = b"SMMR"
+VERSION = 1
+
+# magic, version, fixed dt, tick count, run count
+HEADER = struct.Struct("<4sHdII")
+
+
+def save_recording(path: str, masks: array, dt: float):
+    """
+        Writes per tick key masks as ``(mask, length)`` uint16 runs.
+    """
+
+    runs = array("H")
+
+    for mask in masks:
+        if len(runs) and runs[-2] == mask and runs[-1] < 0xFFFF:
+            runs[-1] += 1
+        else:
+            runs.extend((mask, 1))
+
+    if sys.byteorder == "big":
+        runs.byteswap()
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, dt, len(masks), len(runs) // 2))
+        file.write(runs.tobytes())
+
+def load_recording(path: str) -> tuple[array, float]:
+    with open(path, "rb") as file:
+        magic, version, dt, ticks, run_count = HEADER.unpack(file.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{path}' is not a recording")
+
+        runs = array("H")
+        runs.frombytes(file.read(run_count * 4))
+
+    if sys.byteorder == "big":
+        runs.byteswap()
+
+    masks = array("H")
+
+    for i in range(0, len(runs), 2):
+        masks.extend(array("H", [runs[i]]) * runs[i + 1])
+
+    if len(masks) != ticks:
+        raise ValueError(f"Recording '{path}' is truncated")
+
+    return (masks, dt)
+
+
+class InputRecorder:
+    """
+        Wraps a controls object and keeps the recorded keys of every poll.
+    """
+
+    def __init__(self, controls) -> None:
+        self.controls = controls
+        self.masks = array("H")
+
+    def poll(self):
+        self.controls.poll()
+
+        mask = 0
+
+        for i, key in enumerate(RECORDED_KEYS):
+            if self.controls.pressed(key):
+                mask |= 1 << i
+
+        self.masks.append(mask)
+
+    def pressed(self, key: int) -> bool:
+        return self.controls.pressed(key)
+
+    def save(self, path: str, dt: float):
+        save_recording(path, self.masks, dt)
+
+
+class ReplayControls:
+    """
+        Feeds a recording back one tick per poll.
+    """
+
+    def __init__(self, masks: array, dt: float) -> None:
+        self.masks = masks
+        self.dt = dt
+
+        self.tick = 0
+        self.mask = 0
+
+    @classmethod
+    def load(cls, path: str):
+        return cls(*load_recording(path))
+
+    def poll(self):
+        self.mask = self.masks[self.tick] if self.tick < len(self.masks) else 0
+        self.tick += 1
+
+    def pressed(self, key: int) -> bool:
+        if key not in RECORDED_KEYS: return False
+
+        return bool(self.mask >> RECORDED_KEYS.index(key) & 1)
+
+    def finished(self) -> bool:
+        return self.tick >= len(self.masks)
@@ -1,8 +1,44 @@
 from pygame.time import Clock
 
+# simulation steps per second
+TICK_RATE = 60
+FIXED_DT = 1 / TICK_RATE
+
+# longest frame fed to the simulation, slower frames are slowed down
+MAX_FRAME_TIME = 0.25
+# most steps run in one frame before the backlog is dropped
+MAX_STEPS = 8
+
 deltaTime = 0
 
-def update_dt(clock: Clock):
+accumulator = 0
+alpha = 0
+
+def update_dt(clock: Clock, fps: int = 0):
     global deltaTime
 
-    deltaTime = clock.tick() / 1000
\ No newline at end of file
+    deltaTime = clock.tick(fps) / 1000
+
+def fixed_steps(clock: Clock, fps: int = 0) -> int:
+    """
+        Advances the clock and returns how many ``FIXED_DT`` steps to simulate.\n
+        ``alpha`` is set to how far the frame is between the last two steps.
+    """
+
+    global deltaTime, accumulator, alpha
+
+    accumulator += min(clock.tick(fps) / 1000, MAX_FRAME_TIME)
+
+    steps = int(accumulator // FIXED_DT)
+
+    # spiral of death guard
+    if steps > MAX_STEPS:
+        steps = MAX_STEPS
+        accumulator %= FIXED_DT
+    else:
+        accumulator -= steps * FIXED_DT
+
+    deltaTime = FIXED_DT
+    alpha = accumulator / FIXED_DT
+
+    return steps